@@ -1,4 +1,5 @@
 import streamlit as st
+from pd2.images import show_image
 
 # setup page config
 st.set_page_config(page_title="Home", page_icon="🏡")
@@ -6,7 +7,7 @@ st.set_page_config(page_title="Home", page_icon="🏡")
 # title
 st.title('Copernicus High-Cadence Monitoring for the EU Green Deal')
 # logo gallery
-st.image('data/images/homepage/logo.png', caption='Companies in the consortium executing DEFIS/2022/OP/0012')
+show_image('data/images/homepage/logo.png', caption='Companies in the consortium executing DEFIS/2022/OP/0012')
 
 st.header('Welcome to the page dedicated to the Pilot Demonstrator 2 : Regional Biodiversity Monitoring')
-st.image('data/images/homepage/algaes.jpg', caption='Green algaes in the bay of Saint-Brieuc (08-01-2024).')
\ No newline at end of file
+show_image('data/images/homepage/algaes.jpg', caption='Green algaes in the bay of Saint-Brieuc (08-01-2024).')
\ No newline at end of file
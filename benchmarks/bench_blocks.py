@@ -0,0 +1,100 @@
+"""Throughput and peak memory of block-streamed reads of a regional raster.
+
+Writes a uint8 class raster (EPSG:3035, 10 m, tiled 512 px) spanning
+``scale`` times the extent of the buffered catchment basins in each
+direction, uncompressed and deflate-compressed, then runs each reader in a
+fresh process and reports the time, the throughput over the whole raster
+size (MB/s) and the peak RSS of the process:
+
+- full read : ``src.read()`` of the whole band;
+- blocks : every block through ``pd2.blocks.iter_blocks``;
+- blocks, clip : only the blocks intersecting bv_sb_buf2500;
+- mmap, clip : same, memory-mapped (uncompressed file only);
+- zonal : ``pd2.zonal.streamed_class_areas``, the per-basin areas.
+
+usage : python benchmarks/bench_blocks.py [scale]
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import pd2.zonal  # noqa: E402
+from pd2.blocks import CLIP, iter_blocks, read_clip  # noqa: E402
+
+RES = 10
+BLOCK = 512
+MODES = ['full read', 'blocks', 'blocks, clip', 'mmap, clip', 'zonal']
+
+
+def _write_raster(path, scale, compress):
+    minx, miny, maxx, maxy = read_clip(CLIP, 'EPSG:3035').bounds
+    cx, cy = (minx + maxx) / 2, (miny + maxy) / 2
+    half_w, half_h = scale * (maxx - minx) / 2, scale * (maxy - miny) / 2
+    width, height = int(2 * half_w / RES), int(2 * half_h / RES)
+    profile = {'driver': 'GTiff', 'width': width, 'height': height, 'count': 1, 'dtype': 'uint8',
+               'crs': 'EPSG:3035', 'transform': from_origin(cx - half_w, cy + half_h, RES, RES), 'nodata': 255,
+               'tiled': True, 'blockxsize': BLOCK, 'blockysize': BLOCK}
+    if compress:
+        profile['compress'] = 'deflate'
+    rng = np.random.default_rng(0)
+    with rasterio.open(path, 'w', **profile) as dst:
+        # written by strips of blocks to keep this script's own memory low
+        for row in range(0, height, BLOCK):
+            rows = min(BLOCK, height - row)
+            coarse = rng.integers(0, 4, size=(rows // 16 + 1, width // 16 + 1), dtype=np.uint8)
+            strip = np.kron(coarse, np.ones((16, 16), dtype=np.uint8))[:rows, :width]
+            dst.write(strip, 1, window=Window(0, row, width, rows))
+    return width * height
+
+
+def _run(mode, path, label_dir):
+    pd2.zonal.LABEL_DIR = label_dir
+    if mode == 'full read':
+        with rasterio.open(path) as src:
+            src.read(1).sum()
+    elif mode == 'zonal':
+        pd2.zonal.streamed_class_areas(path)
+    else:
+        clip = CLIP if 'clip' in mode else None
+        for _, block in iter_blocks(path, clip, mmap=mode.startswith('mmap')):
+            block.sum()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 5 and sys.argv[1] == '--run':
+        os.chdir(ROOT)
+        start = time.perf_counter()
+        _run(sys.argv[2], sys.argv[3], sys.argv[4])
+        elapsed = time.perf_counter() - start
+        print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+        sys.exit()
+
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    with tempfile.TemporaryDirectory() as tmp:
+        label_dir = os.path.join(tmp, 'labels')
+        for compress in (False, True):
+            path = os.path.join(tmp, f'regional_{compress}.tif')
+            n_bytes = _write_raster(path, scale, compress)
+            # warm the label cache and the page cache
+            subprocess.run([sys.executable, __file__, '--run', 'zonal', path, label_dir], check=True,
+                           capture_output=True)
+            print(f'{"deflate" if compress else "uncompressed"}, {n_bytes / 1e6:.0f} MB raster '
+                  f'({os.path.getsize(path) / 1e6:.0f} MB on disk)')
+            print(f'  {"reader":<14} {"time (s)":>9} {"MB/s":>9} {"peak RSS (MB)":>14}')
+            for mode in MODES:
+                if compress and mode.startswith('mmap'):
+                    continue
+                out = subprocess.run([sys.executable, __file__, '--run', mode, path, label_dir], check=True,
+                                     capture_output=True, text=True).stdout.split()
+                elapsed, rss = float(out[-2]), float(out[-1])
+                print(f'  {mode:<14} {elapsed:>9.2f} {n_bytes / 1e6 / elapsed:>9.0f} {rss:>14.0f}')
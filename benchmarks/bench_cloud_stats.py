@@ -0,0 +1,75 @@
+"""Time the cloud stats of a season of synthetic Sentinel-2 masks.
+
+Writes ``n_scenes`` tiled uint8 masks on the T30UWU grid (20 m) with random
+cloud blobs, then compares reading each mask whole with the windowed read of
+``pd2.clouds`` in one process and in a pool of every CPU.
+
+usage : python benchmarks/bench_cloud_stats.py [n_scenes]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import rasterio
+from rasterio.features import geometry_mask
+from rasterio.transform import from_origin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.clouds import _roi_in, compute_cloud_stats, read_roi, scene_date  # noqa: E402
+
+SIZE = 5490
+NODATA = 255
+
+
+def _write_mask(path, rng):
+    # smooth blobs so the masks compress like real ones
+    coarse = rng.random((SIZE // 90 + 1, SIZE // 90 + 1)) < rng.random()
+    data = np.kron(coarse, np.ones((90, 90), dtype=np.uint8))[:SIZE, :SIZE].astype(np.uint8)
+    data[:, :rng.integers(0, SIZE // 4)] = NODATA
+    with rasterio.open(path, 'w', driver='GTiff', width=SIZE, height=SIZE, count=1, dtype='uint8',
+                       crs='EPSG:32630', transform=from_origin(499980, 5400000, 20, 20), nodata=NODATA,
+                       tiled=True, blockxsize=512, blockysize=512, compress='deflate') as dst:
+        dst.write(data, 1)
+
+
+def _full_read(paths, roi):
+    # reference: whole band, whole-scene roi mask
+    rows = []
+    for path in paths:
+        with rasterio.open(path) as src:
+            data = src.read(1)
+            inside = geometry_mask([_roi_in(src.crs.to_wkt(), roi)], out_shape=data.shape,
+                                   transform=src.transform, invert=True)
+        valid = inside & (data != NODATA)
+        rows.append((scene_date(path), 100 * np.count_nonzero(data[valid]) / inside.sum()))
+    return rows
+
+
+def _timeit(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    n_scenes = int(sys.argv[1]) if len(sys.argv) > 1 else 46
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(n_scenes):
+            day = np.datetime64('2022-03-02') + 5 * i
+            name = f'S2X_MSIL2A_{str(day).replace("-", "")}T110859_N0400_R137_T30UWU_umask.tif'
+            paths.append(os.path.join(tmp, name))
+            _write_mask(paths[-1], rng)
+
+        full, reference = _timeit(lambda: _full_read(paths, read_roi()))
+        windowed, stats = _timeit(lambda: compute_cloud_stats(paths, workers=1))
+        pooled, _ = _timeit(lambda: compute_cloud_stats(paths))
+        assert np.allclose(stats['perc_cloud'], [p for _, p in reference])
+
+    print(f'{n_scenes} scenes of {SIZE} x {SIZE} px, {os.cpu_count()} CPUs')
+    print(f'{"full read":<20} {full:>8.2f} s')
+    print(f'{"windowed":<20} {windowed:>8.2f} s')
+    print(f'{"windowed, pool":<20} {pooled:>8.2f} s')
@@ -0,0 +1,75 @@
+"""Time the crop cover duration engine over a large synthetic NDVI store.
+
+Parcels are the sample series of the store, shifted by a few days, scaled and
+with a random set of clear days, written as a store of ``n_parcels`` rows.
+Reports the time of ``store_cover_duration`` over the whole store and of a
+per-parcel pandas loop (interpolate then count) on a subset, extrapolated.
+
+usage : python benchmarks/bench_cover_duration.py [n_parcels]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.ndvi import (DELTA_END, DELTA_START, NDVI_THRESHOLD, cover_duration, interpolate_gaps,  # noqa: E402
+                      load_ndvi_store, store_cover_duration)
+
+LOOP_PARCELS = 2_000
+
+
+def _synthetic_store(path, n_parcels, chunk=100_000):
+    _, ndvi, dates = load_ndvi_store()
+    # the sample parcel with every gap filled, as the underlying signal
+    signal = np.nan_to_num(interpolate_gaps(ndvi[:1]), nan=0.2)[0]
+    rng = np.random.default_rng(0)
+    os.makedirs(path)
+    out = np.lib.format.open_memmap(os.path.join(path, 'ndvi.npy'), mode='w+', dtype=np.float32,
+                                    shape=(n_parcels, len(dates)))
+    for start in range(0, n_parcels, chunk):
+        rows = min(chunk, n_parcels - start)
+        shifts = rng.integers(-20, 21, size=rows)
+        series = signal[np.clip(np.arange(len(dates)) + shifts[:, None], 0, len(dates) - 1)]
+        series = series * rng.uniform(0.8, 1.2, size=(rows, 1)).astype(np.float32)
+        # about the clear day rate of the sample parcel
+        series[rng.random(series.shape) > 0.12] = np.nan
+        out[start:start + rows] = series
+    out.flush()
+    parcels = pd.DataFrame({'ida': np.arange(n_parcels).astype(str), 'ddc': ''})
+    parcels.to_csv(os.path.join(path, 'parcels.csv'), index=False)
+    np.save(os.path.join(path, 'dates.npy'), dates)
+
+
+def _pandas_loop(ndvi):
+    ddc = []
+    for series in ndvi:
+        filled = pd.Series(series).interpolate(limit_area='inside').to_numpy()[DELTA_START:DELTA_END]
+        ddc.append(int((filled >= NDVI_THRESHOLD).sum()))
+    return np.array(ddc)
+
+
+if __name__ == '__main__':
+    n_parcels = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'store')
+        _synthetic_store(path, n_parcels)
+        _, ndvi, dates = load_ndvi_store(path)
+        print(f'{n_parcels} parcels x {len(dates)} days ({ndvi.nbytes / 1e9:.2f} GB)')
+
+        subset = np.array(ndvi[:LOOP_PARCELS])
+        start = time.perf_counter()
+        expected = _pandas_loop(subset)
+        loop = (time.perf_counter() - start) * n_parcels / len(subset)
+        if not np.array_equal(expected, cover_duration(subset)):
+            raise AssertionError('vectorized ddc differs from the pandas loop')
+
+        start = time.perf_counter()
+        ddc = store_cover_duration(path, workers=1)
+        engine = time.perf_counter() - start
+        print(f'  pandas loop (extrapolated) : {loop:8.1f} s')
+        print(f'  store_cover_duration       : {engine:8.1f} s  ({n_parcels / engine:,.0f} parcels/s)')
+        print(f'  ddc : median {np.median(ddc):.0f} d, 5-95% {np.percentile(ddc, 5):.0f}-{np.percentile(ddc, 95):.0f} d')
@@ -0,0 +1,73 @@
+"""Time the crop area cube on synthetic parcel classification vectors.
+
+Writes a square grid of parcels (``size`` metres, random crops of
+``pd2.crops.CROPS``) covering the catchment basins, then times the areas per
+(basin, crop) of ``pd2.crops.parcel_crop_areas`` against clipping the parcels
+to one basin at a time, and the query of a year from the cube.
+
+usage : python benchmarks/bench_crop_cube.py [size]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.crops import AREA_CRS, CROPS, crop_shares, parcel_crop_areas, write_partition  # noqa: E402
+from pd2.zonal import read_basins  # noqa: E402
+
+
+def _write_parcels(path, size):
+    _, geoms = read_basins(crs=AREA_CRS)
+    minx, miny, maxx, maxy = shapely.total_bounds(geoms)
+    x, y = np.meshgrid(np.arange(minx, maxx, size), np.arange(miny, maxy, size))
+    parcels = shapely.box(x.ravel(), y.ravel(), x.ravel() + size, y.ravel() + size)
+    parcels = parcels[shapely.intersects(parcels, shapely.union_all(geoms))]
+    crops = np.random.default_rng(0).choice(list(CROPS), size=len(parcels))
+    gpd.GeoDataFrame({'crop': crops}, geometry=parcels, crs=AREA_CRS).to_file(path, engine='pyogrio')
+    return len(parcels)
+
+
+def _per_basin_clip(path):
+    # reference: the parcels clipped to each basin in turn
+    parcels = gpd.read_file(path).to_crs(AREA_CRS)
+    ids, geoms = read_basins(crs=AREA_CRS)
+    rows = []
+    for ida, geom in zip(ids, geoms):
+        clipped = gpd.clip(parcels, geom)
+        rows.append(clipped.assign(basin=ida, area_ha=clipped.area / 1e4).groupby(['basin', 'crop'])['area_ha'].sum())
+    return pd.concat(rows)
+
+
+def _timeit(func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+if __name__ == '__main__':
+    size = float(sys.argv[1]) if len(sys.argv) > 1 else 100
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'parcels.gpkg')
+        n = _write_parcels(path, size)
+        print(f'{n:,} parcels of {size:g} m')
+
+        t_clip, reference = _timeit(lambda: _per_basin_clip(path))
+        t_cube, areas = _timeit(lambda: parcel_crop_areas(path))
+        error = (areas.set_index(['basin', 'crop'])['area_ha'] - reference).abs().max()
+        print(f'  clip per basin      : {t_clip:8.2f} s')
+        print(f'  parcel_crop_areas   : {t_cube:8.2f} s  (max difference {error:.1e} ha)')
+
+        store = os.path.join(tmp, 'crops')
+        write_partition(path, 2023, store)
+        crop_shares(2023, store=store)
+        t_all, _ = _timeit(lambda: crop_shares(2023, store=store), repeat=100)
+        t_two, _ = _timeit(lambda: crop_shares(2023, [1, 2], store=store), repeat=100)
+        print(f'  cube, all basins    : {1000 * t_all:8.2f} ms  (cached partition)')
+        print(f'  cube, two basins    : {1000 * t_two:8.2f} ms')
@@ -0,0 +1,37 @@
+"""Payload size and folium render time of each level of the GeoJSON pyramid.
+
+Run scripts/build_geojson.py first.
+
+usage : python benchmarks/bench_geojson_levels.py [repeat]
+"""
+import os
+import sys
+import time
+
+import folium
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.layers import LAYERS, PYRAMID, geojson_path  # noqa: E402
+
+
+def _render(geojson):
+    study_map = folium.Map(location=[48.589098, -2.432541], zoom_start=9)
+    folium.GeoJson(geojson, style_function=lambda x: {}).add_to(study_map)
+    return study_map.get_root().render()
+
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print(f'{"layer":<10} {"level":>5} {"min zoom":>8} {"tolerance":>9} {"payload kB":>10} {"html kB":>8} {"render (ms)":>11}')
+    for name in LAYERS:
+        for level, (min_zoom, tolerance) in enumerate(PYRAMID):
+            path = geojson_path(name, level)
+            with open(path) as f:
+                geojson = f.read()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                html = _render(geojson)
+            elapsed = (time.perf_counter() - start) / repeat
+            print(f'{name:<10} {level:>5} {min_zoom:>8} {tolerance:>9} {os.path.getsize(path) / 1e3:>10.1f} '
+                  f'{len(html) / 1e3:>8.1f} {elapsed * 1e3:>11.1f}')
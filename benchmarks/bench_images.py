@@ -0,0 +1,76 @@
+"""Bytes sent and load time of every page, with and without the image derivatives.
+
+Each page (and each section of the CLMS / third-party side bars) is run with
+streamlit's AppTest while recording the size of the media files it registers.
+Load time is the script run time plus the transfer of those bytes at
+BANDWIDTH. Run scripts/build_images.py first.
+
+usage : python benchmarks/bench_images.py
+"""
+import glob
+import logging
+import os
+import sys
+import time
+
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import pd2.images  # noqa: E402
+
+# 20 Mbit/s
+BANDWIDTH = 20e6 / 8
+
+_sent = []
+_load_and_get_id = MemoryMediaFileStorage.load_and_get_id
+
+
+def _recording_load_and_get_id(self, path_or_data, *args, **kwargs):
+    if not isinstance(path_or_data, str):
+        _sent.append(len(path_or_data))
+    elif os.path.exists(path_or_data):
+        _sent.append(os.path.getsize(path_or_data))
+    return _load_and_get_id(self, path_or_data, *args, **kwargs)
+
+
+def _views():
+    for path in [glob.glob(os.path.join(ROOT, '1_*.py'))[0]] + sorted(glob.glob(os.path.join(ROOT, 'pages', '*.py'))):
+        at = AppTest.from_file(path, default_timeout=300)
+        at.run()
+        sections = at.sidebar.radio[0].options if at.sidebar.radio else [None]
+        for section in sections:
+            yield path, section
+
+
+def _measure(path, section):
+    at = AppTest.from_file(path, default_timeout=300)
+    if section is not None:
+        at.run()
+        at.sidebar.radio[0].set_value(section)
+    _sent.clear()
+    start = time.perf_counter()
+    at.run()
+    return time.perf_counter() - start, sum(_sent), bool(at.exception)
+
+
+if __name__ == '__main__':
+    MemoryMediaFileStorage.load_and_get_id = _recording_load_and_get_id
+    logging.getLogger('streamlit').setLevel(logging.CRITICAL)
+    os.chdir(ROOT)
+    manifest = pd2.images.MANIFEST
+
+    print(f'{"page":<45} {"before MB":>9} {"after MB":>9} {"before (s)":>10} {"after (s)":>10}')
+    totals = [0, 0, 0, 0]
+    for path, section in list(_views()):
+        pd2.images.MANIFEST = os.path.join(ROOT, 'missing-manifest.json')
+        run_before, sent_before, failed = _measure(path, section)
+        pd2.images.MANIFEST = manifest
+        run_after, sent_after, _ = _measure(path, section)
+        row = [sent_before / 1e6, sent_after / 1e6,
+               run_before + sent_before / BANDWIDTH, run_after + sent_after / BANDWIDTH]
+        totals = [t + r for t, r in zip(totals, row)]
+        label = os.path.basename(path)[:-3] + (f' / {section}' if section else '') + (' (error)' if failed else '')
+        print(f'{label:<45} {row[0]:>9.2f} {row[1]:>9.2f} {row[2]:>10.2f} {row[3]:>10.2f}')
+    print(f'{"total":<45} {totals[0]:>9.2f} {totals[1]:>9.2f} {totals[2]:>10.2f} {totals[3]:>10.2f}')
@@ -0,0 +1,59 @@
+"""Benchmark the bulk NDVI parser against the former row-by-row parser.
+
+Synthetic parcels are built from the series stored in cover_duration.csv, so
+the strings have the same length and nan density as the real data.
+
+usage : python benchmarks/bench_ndvi_parse.py [max_parcels]
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+from pyogrio import read_dataframe
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.ndvi import parse_ndvi_series  # noqa: E402
+
+SIZES = [1, 10, 100, 1_000, 10_000, 100_000]
+# the legacy parser is quadratic, stop timing it past this size
+LEGACY_MAX = 1_000
+
+
+def _legacy_parse(df):
+    # former _ts_str_to_foat from the third-party page
+    new_df = pd.DataFrame(columns=['ida', 'ddc', 'ndvi_raw'])
+    for index, row in df.iterrows():
+        ts_list = []
+        for r in row['ts_mean_raw_s2'].split(","):
+            ts_list.append(float(r.replace("[", "").replace(" ", "").replace("]", "")))
+        dfi = pd.DataFrame({'ida': row['ida'], 'ddc': row['ddc'], 'ndvi_raw': [ts_list]})
+        new_df = pd.concat([new_df, dfi])
+    return new_df
+
+
+def _synthetic(df, n):
+    out = df.iloc[[0] * n].reset_index(drop=True)
+    out['ida'] = [str(i) for i in range(n)]
+    return out
+
+
+def _timeit(func, df):
+    start = time.perf_counter()
+    func(df)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    max_parcels = int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1]
+    base = read_dataframe('data/dataframes/cover_duration.csv')
+
+    print(f'{"parcels":>10} {"bulk (s)":>10} {"legacy (s)":>11} {"speed-up":>9}')
+    for n in [s for s in SIZES if s <= max_parcels]:
+        df = _synthetic(base, n)
+        bulk = _timeit(parse_ndvi_series, df)
+        if n <= LEGACY_MAX:
+            legacy = _timeit(_legacy_parse, df)
+            print(f'{n:>10} {bulk:>10.4f} {legacy:>11.4f} {legacy / bulk:>8.1f}x')
+        else:
+            print(f'{n:>10} {bulk:>10.4f} {"-":>11} {"-":>9}')
@@ -0,0 +1,75 @@
+"""Compare the stringified NDVI csv with the dense .npy store.
+
+For each size, reports the on-disk size of both formats, the time to load
+every series, and the time to fetch a single parcel (what the crop cover
+duration page needs): by a scan of the ids, and through the cached ``ida``
+index of ``pd2.ndvi.parcel_series`` once built.
+
+usage : python benchmarks/bench_ndvi_store.py [max_parcels]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from pyogrio import read_dataframe
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.ndvi import load_ndvi_store, parcel_series, parse_ndvi_series, write_ndvi_store  # noqa: E402
+
+SIZES = [1, 1_000, 10_000, 100_000]
+
+
+def _size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def _timeit(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _csv_one(path, ida):
+    parcels, ndvi = parse_ndvi_series(read_dataframe(path))
+    return ndvi[(parcels['ida'] == ida).to_numpy()][0]
+
+
+def _store_one(path, ida):
+    parcels, ndvi, _ = load_ndvi_store(path)
+    return np.array(ndvi[(parcels['ida'] == ida).to_numpy()][0])
+
+
+def _store_all(path):
+    return np.array(load_ndvi_store(path)[1])
+
+
+if __name__ == '__main__':
+    max_parcels = int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1]
+    base = read_dataframe('data/dataframes/cover_duration.csv')
+
+    print(f'{"parcels":>8} {"csv MB":>8} {"npy MB":>8} {"csv all (s)":>12} {"npy all (s)":>12} '
+          f'{"csv one (s)":>12} {"npy one (s)":>12} {"indexed (s)":>12}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [s for s in SIZES if s <= max_parcels]:
+            df = base.iloc[[0] * n].reset_index(drop=True)
+            df['ida'] = [str(i) for i in range(n)]
+            csv_path = os.path.join(tmp, f'cover_{n}.csv')
+            store_path = os.path.join(tmp, f'store_{n}')
+            df.to_csv(csv_path, index=False)
+            parcels, ndvi = parse_ndvi_series(df)
+            write_ndvi_store(store_path, parcels, ndvi,
+                             np.datetime64('2022-09-01') + np.arange(ndvi.shape[1]))
+
+            ida = str(n // 2)
+            csv_all = _timeit(lambda: parse_ndvi_series(read_dataframe(csv_path)))
+            npy_all = _timeit(lambda: _store_all(store_path))
+            csv_one = _timeit(lambda: _csv_one(csv_path, ida))
+            npy_one = _timeit(lambda: _store_one(store_path, ida))
+            parcel_series('0', store_path)
+            indexed = _timeit(lambda: parcel_series(ida, store_path))
+            print(f'{n:>8} {_size(csv_path) / 1e6:>8.2f} {_size(store_path) / 1e6:>8.2f} '
+                  f'{csv_all:>12.4f} {npy_all:>12.4f} {csv_one:>12.4f} {npy_one:>12.4f} {indexed:>12.6f}')
@@ -0,0 +1,65 @@
+"""Rerun wall time of every page, whole page versus its sections.
+
+Before sections, any widget change reran the whole page script; now a widget
+only reruns the section (``pd2.fragments.section``) it belongs to. For each
+page, and each section of the CLMS / third-party side bars, the page is run
+once to warm the caches, then rerun REPEATS times with streamlit's AppTest;
+the table gives the median full rerun time and the median time of each
+section over the same runs.
+
+usage : python benchmarks/bench_reruns.py
+"""
+import glob
+import logging
+import os
+import statistics
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from pd2.fragments import TIMINGS  # noqa: E402
+
+REPEATS = 5
+
+
+def _views():
+    for path in [glob.glob(os.path.join(ROOT, '1_*.py'))[0]] + sorted(glob.glob(os.path.join(ROOT, 'pages', '*.py'))):
+        at = AppTest.from_file(path, default_timeout=300)
+        at.run()
+        for option in (at.sidebar.radio[0].options if at.sidebar.radio else [None]):
+            yield path, option
+
+
+def _measure(path, option):
+    at = AppTest.from_file(path, default_timeout=300)
+    at.run()
+    if option is not None:
+        at.sidebar.radio[0].set_value(option)
+        at.run()
+    page_times, section_times = [], {}
+    for _ in range(REPEATS):
+        TIMINGS.clear()
+        start = time.perf_counter()
+        at.run()
+        page_times.append(time.perf_counter() - start)
+        for name, seconds in TIMINGS.items():
+            section_times.setdefault(name, []).append(seconds)
+    sections = {name: statistics.median(times) for name, times in section_times.items()}
+    return statistics.median(page_times), sections, bool(at.exception)
+
+
+if __name__ == '__main__':
+    logging.getLogger('streamlit').setLevel(logging.CRITICAL)
+    os.chdir(ROOT)
+
+    print(f'{"page":<50} {"page (s)":>9}  {"section":<20} {"section (s)":>11}')
+    for path, option in list(_views()):
+        page_time, sections, failed = _measure(path, option)
+        label = os.path.basename(path)[:-3] + (f' / {option}' if option else '') + (' (error)' if failed else '')
+        rows = sorted(sections.items()) or [('-', float('nan'))]
+        for i, (name, seconds) in enumerate(rows):
+            page_col = f'{page_time:>9.3f}' if i == 0 else ' ' * 9
+            print(f'{label if i == 0 else "":<50} {page_col}  {name:<20} {seconds:>11.3f}')
@@ -0,0 +1,55 @@
+"""Time the Whittaker smoothing of a large synthetic NDVI store.
+
+Uses the synthetic store of ``bench_cover_duration.py`` (sample series
+shifted, scaled and with random clear days). Reports the time of
+``store_whittaker`` over the whole store, and the time of a per-parcel dense
+``np.linalg.solve`` on a subset, extrapolated.
+
+usage : python benchmarks/bench_smooth.py [n_parcels]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_cover_duration import _synthetic_store  # noqa: E402
+from pd2.ndvi import WHITTAKER_LAMBDA, load_ndvi_store, store_whittaker, whittaker  # noqa: E402
+
+LOOP_PARCELS = 200
+
+
+def _dense_loop(ndvi, lam=WHITTAKER_LAMBDA):
+    n = ndvi.shape[1]
+    dtd = lam * (lambda d: d.T @ d)(np.diff(np.eye(n), 2, axis=0))
+    out = []
+    for series in ndvi:
+        w = np.isfinite(series).astype(float)
+        out.append(np.linalg.solve(np.diag(w) + dtd, np.nan_to_num(series) * w))
+    return np.array(out)
+
+
+if __name__ == '__main__':
+    n_parcels = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'store')
+        _synthetic_store(path, n_parcels)
+        _, ndvi, dates = load_ndvi_store(path)
+        print(f'{n_parcels} parcels x {len(dates)} days ({ndvi.nbytes / 1e9:.2f} GB)')
+
+        subset = np.array(ndvi[:LOOP_PARCELS])
+        start = time.perf_counter()
+        expected = _dense_loop(subset)
+        loop = (time.perf_counter() - start) * n_parcels / len(subset)
+        smoothed = whittaker(subset)
+        inside = np.isfinite(smoothed)
+        error = np.abs(smoothed[inside] - expected[inside]).max()
+
+        start = time.perf_counter()
+        store_whittaker(path, workers=1)
+        engine = time.perf_counter() - start
+        print(f'  dense solve loop (extrapolated) : {loop:8.1f} s')
+        print(f'  store_whittaker                 : {engine:8.1f} s  ({n_parcels / engine:,.0f} parcels/s)')
+        print(f'  max difference with the dense solve : {error:.1e}')
@@ -0,0 +1,77 @@
+"""Time per-basin class areas on a synthetic CLMS-like raster.
+
+Writes a tiled uint8 class raster (4 classes, EPSG:3035) covering the
+catchment basins at ``res`` metres, then compares one rasterized mask per
+basin over the whole raster with ``pd2.zonal.class_areas`` (label raster
+cached, chunked bincounts), cold and warm label cache, in one process and in
+a pool of every CPU.
+
+usage : python benchmarks/bench_zonal.py [res]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import rasterio
+from rasterio.features import geometry_mask
+from rasterio.transform import from_origin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pd2.zonal  # noqa: E402
+from pd2.zonal import class_areas, read_basins  # noqa: E402
+
+
+def _write_raster(path, res):
+    _, geoms = read_basins(crs=3035)
+    minx, miny, maxx, maxy = np.array([g.bounds for g in geoms]).T
+    minx, miny, maxx, maxy = minx.min() - 1000, miny.min() - 1000, maxx.max() + 1000, maxy.max() + 1000
+    width, height = int((maxx - minx) / res), int((maxy - miny) / res)
+    rng = np.random.default_rng(0)
+    coarse = rng.integers(0, 4, size=(height // 50 + 1, width // 50 + 1), dtype=np.uint8)
+    data = np.kron(coarse, np.ones((50, 50), dtype=np.uint8))[:height, :width]
+    with rasterio.open(path, 'w', driver='GTiff', width=width, height=height, count=1, dtype='uint8',
+                       crs='EPSG:3035', transform=from_origin(minx, maxy, res, res), nodata=255,
+                       tiled=True, compress='deflate') as dst:
+        dst.write(data, 1)
+    return width, height
+
+
+def _per_basin_masks(path):
+    # reference: one full-raster mask per basin
+    with rasterio.open(path) as src:
+        data = src.read(1)
+        ids, geoms = read_basins(crs=src.crs)
+        pixel_ha = src.res[0] * src.res[1] / 1e4
+        rows = []
+        for geom in geoms:
+            inside = geometry_mask([geom], out_shape=data.shape, transform=src.transform, invert=True)
+            rows.append(np.bincount(data[inside], minlength=256)[:4] * pixel_ha)
+    return np.array(rows)
+
+
+def _timeit(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    res = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.TemporaryDirectory() as tmp:
+        pd2.zonal.LABEL_DIR = os.path.join(tmp, 'labels')
+        path = os.path.join(tmp, 'classes.tif')
+        width, height = _write_raster(path, res)
+
+        masks, reference = _timeit(lambda: _per_basin_masks(path))
+        cold, areas = _timeit(lambda: class_areas(path, workers=1))
+        warm, _ = _timeit(lambda: class_areas(path, workers=1))
+        pooled, _ = _timeit(lambda: class_areas(path))
+        assert np.allclose(areas.reindex(columns=range(4), fill_value=0).to_numpy(), reference)
+
+    print(f'{width} x {height} px at {res:g} m, {os.cpu_count()} CPUs')
+    print(f'{"mask per basin":<24} {masks:>8.2f} s')
+    print(f'{"bincount, cold labels":<24} {cold:>8.2f} s')
+    print(f'{"bincount, cached labels":<24} {warm:>8.2f} s')
+    print(f'{"bincount, pool":<24} {pooled:>8.2f} s')
@@ -1,22 +1,26 @@
-import geopandas as gpd
 import streamlit as st
+from pd2.fragments import section
+from pd2.layers import load_geojson
+from pd2.tiles import tile_layer, tiles_enabled
 import folium
 from streamlit_folium import st_folium
 from branca.element import Template, MacroElement
 
 # function
-def map_bv():
-    bv_geom = gpd.read_file('data/geometries/bv_sb-4326.fgb', engine='pyogrio')
-    bv_geom['DateCreationOH'] = bv_geom['DateCreationOH'].astype('string')
-    bv_geom = bv_geom.rename(columns={'ida': 'BV Ref'})
-    bv_geom = bv_geom.to_json()
+def map_bv(study_map, study_layers, zoom):
     bv_style = {'fillColor': '#C0C0C0', 'color': '#696969'}
+    if tiles_enabled():
+        tile_layer('bv_sb', bv_style,
+                   fields=['BV Ref', 'area_km2'],
+                   aliases=['BV Ref : ', 'Area (km²) : ']).add_to(study_map)
+        return
+    bv_geom = load_geojson('bv_sb', zoom)
     folium.GeoJson(bv_geom,
                    style_function=lambda x: bv_style,
                    popup=folium.GeoJsonPopup(
                        fields=['BV Ref', 'area_km2'],
                        aliases=['BV Ref : ', 'Area (km²) : ']
-                   )).add_to(study_map)
+                   )).add_to(study_layers)
 
 
 # 1. context
@@ -79,32 +83,52 @@ legend_template = """
 </style>
 {% endmacro %}
 """
-# init study map
-study_map = folium.Map(location=[48.589098, -2.432541],
-                       zoom_start=9,
-                       attr='© OpenStreetMap contributors')
-
-# Add the legend to the map
-macro = MacroElement()
-macro._template = Template(legend_template)
-study_map.get_root().add_child(macro)
-
-# map catchment basin
-bv_map = map_bv()
-
-# N2K sites map
-n2k_style = {'fillColor': '#87CEFA', 'color': '#1E90FF'}
-n2k_geom = gpd.read_file('data/geometries/n2000_sb-4326.fgb').to_json()
-folium.GeoJson(n2k_geom,
-               style_function=lambda x:n2k_style,
-               popup=folium.GeoJsonPopup(
+
+
+# the map is a section : zooming only reruns the map, not the page
+@section
+def study_area_map():
+    # init study map
+    study_map = folium.Map(location=[48.589098, -2.432541],
+                           zoom_start=9,
+                           attr='© OpenStreetMap contributors')
+
+    # Add the legend to the map
+    macro = MacroElement()
+    macro._template = Template(legend_template)
+    study_map.get_root().add_child(macro)
+
+    # layers are served at the resolution of the current zoom (see pd2.layers.PYRAMID)
+    # and swapped in place by st_folium, without reloading the map, or as vector
+    # tiles in tile server mode (see pd2.tiles)
+    zoom = st.session_state.get('study_map', {}).get('zoom') or 9
+    study_layers = folium.FeatureGroup(name='Study area')
+
+    # map catchment basin
+    bv_map = map_bv(study_map, study_layers, zoom)
+
+    # N2K sites map
+    n2k_style = {'fillColor': '#87CEFA', 'color': '#1E90FF'}
+    if tiles_enabled():
+        tile_layer('n2000_sb', n2k_style,
                    fields=['SITECODE', 'SITENAME', 'SITETYPE'],
-                   aliases=['Site code : ', 'Site name : ', 'Site Type : ']
-               )).add_to(study_map)
+                   aliases=['Site code : ', 'Site name : ', 'Site Type : ']).add_to(study_map)
+    else:
+        n2k_geom = load_geojson('n2000_sb', zoom)
+        folium.GeoJson(n2k_geom,
+                       style_function=lambda x:n2k_style,
+                       popup=folium.GeoJsonPopup(
+                           fields=['SITECODE', 'SITENAME', 'SITETYPE'],
+                           aliases=['Site code : ', 'Site name : ', 'Site Type : ']
+                       )).add_to(study_layers)
+
+    #folium.LayerControl().add_to(study_map)
+    # display, only a zoom change triggers a rerun
+    sm = st_folium(study_map, key='study_map', width=900, height=600,
+                   feature_group_to_add=study_layers, returned_objects=['zoom'])
+
 
-#folium.LayerControl().add_to(study_map)
-# display
-sm = st_folium(study_map, width=900, height=600)
+study_area_map()
 
 st.header(f'Please navigate through the side bar to explore the PD2 content')
 st.markdown('- To discover an inventory of Copernicus Land Monitoring Services (CLMS) that can be used to monitore farming pressure on local and regional environment and there limitations, click the link below : ')
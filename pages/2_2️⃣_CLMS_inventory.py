@@ -1,7 +1,9 @@
-import os
-import glob
 import streamlit as st
-from pyogrio import read_dataframe
+from pd2.data import read_dataframe
+from pd2.fragments import section
+from pd2.rasters import show_raster
+from pd2.images import image_for, show_image
+from pd2.registry import asset, latest, years
 from streamlit_image_comparison import image_comparison
 
 # functions
@@ -26,6 +28,71 @@ def generate_box():
 )
 
 
+# sections : a widget change only reruns the section it belongs to
+@section
+def year_map(name, label, caption):
+    y = st.selectbox(label, options=years(name))
+    show_raster(asset(name, 'status', y)['path'], caption=caption.format(y=y))
+
+
+@section
+def clc_maps():
+    # display clc map according to year selected by the user (status + change)
+    y = st.selectbox("Select a year : ", options=years('clc'))
+    show_raster(asset('clc', 'status', y)['path'], caption=f"CLC map ({y})")
+    change_map = asset('clc', 'change_map', y)
+    if change_map is not None:
+        d1, d2 = change_map['start'], change_map['end']
+        st.subheader(f'CLC change map {d1} - {d2}')
+        show_raster(change_map['path'], caption=f"CLC change map ({d1} - {d2})")
+        change_table = asset('clc', 'change_table', y)
+        if change_table is not None:
+            st.subheader(f'CLC change table {d1} - {d2}')
+            show_image(change_table['path'], caption=f"CLC change table ({d1} - {d2})", stretch=True)
+
+
+def change_maps(name, label):
+    # latest change map and table of a product
+    change_map = latest(name, 'change_map')
+    d1, d2 = change_map['start'], change_map['end']
+    st.subheader(f'{label} change map {d1} - {d2}')
+    show_raster(change_map['path'], caption=f"{label} change map ({d1}-{d2})")
+    change_table = asset(name, 'change_table', d2)
+    if change_table is not None:
+        st.subheader(f'{label} change table {d1} - {d2}')
+        show_image(change_table['path'], caption=f"{label} change table ({d1}-{d2})", stretch=True)
+
+
+@section
+def swf_zoom():
+    # swf omissions / commissions
+    gl_select = st.selectbox("Zoom on SWF data", options=['SWF 2015', 'SWF 2018'])
+    if gl_select == 'SWF 2015':
+        show_image('data/images/clms/swf_henon_2015_5m_err.png')
+    elif gl_select == 'SWF 2018':
+        show_image('data/images/clms/swf_henon_2018_5m_err.png')
+
+
+@section
+def tccm_maps():
+    # display tccm map according to year selected by the user (change)
+    periods = [asset('tccm', 'change_map', y) for y in years('tccm', 'change_map')]
+    change_map = st.selectbox("Select a year:", options=periods, format_func=lambda e: f"{e['start']}-{e['end']}")
+    y = f"{change_map['start'][2:]}-{change_map['end'][2:]}"
+    show_raster(change_map['path'], caption=f"TCCM map ({y})")
+
+    # barplot grassland change 2015-2018
+    tccm = read_dataframe(f'data/dataframes/tccm_{y}.csv')
+    tccm['Catchment basin'] = tccm['Catchment basin'].astype('int')
+    tccm['Gain'] = tccm['Gain'].astype('float')
+    tccm['Loss'] = tccm['Loss'].astype('float')
+    st.bar_chart(tccm,
+                 x='Catchment basin',
+                 y=['Gain', 'Loss'],
+                 y_label='Surface (ha)',
+                 stack=False)
+
+
 # side bar
 st.sidebar.title('CLMS inventory')
 page = st.sidebar.radio('Go to', ['Corine Land Cover', 'Costal Zones', 'Riparian Zones', 'Urban Atlas',
@@ -52,23 +119,7 @@ if page == 'Corine Land Cover':
 
     # clc map
     st.subheader('CLC map')
-    # display clc map according to year selected by the user (status + change)
-    years = ['1990', '2000', '2006', '2012', '2018']
-    y = st.selectbox("Select a year : ", options=years)
-    st.image(f'data/images/clms/clc_{y}.png', caption=f"CLC map ({y})", use_column_width=True)
-    if y != '1990':
-        change_map = glob.glob(f'data/images/clms/clc_change_map*{y[-2:]}.png')[0]
-        change_table = glob.glob(f'data/images/clms/clc_change_table*{y[-2:]}.png')[0]
-        d1 = os.path.basename(change_map).split("_")[-1][0:2]
-        if d1 == '90':
-            d1 = '1990'
-        else:
-            d1 = f'20{d1}'
-        d2 = f'20{os.path.basename(change_map).split("_")[-1][3:5]}'
-        st.subheader(f'CLC change map {d1} - {d2}')
-        st.image(change_map, caption=f"CLC change map ({d1} - {d2})", use_column_width=True)
-        st.subheader(f'CLC change table {d1} - {d2}')
-        st.image(change_table, caption=f"CLC change table ({d1} - {d2})", use_column_width=True)
+    clc_maps()
 
     #highlights
     st.subheader('Highlights')
@@ -99,13 +150,8 @@ if page == 'Costal Zones':
     # cz map
     st.subheader('CZ map')
     # display clc map according to year selected by the user (status + change)
-    years = ['2012', '2018']
-    y = st.selectbox("Select a year : ", options=years)
-    st.image(f'data/images/clms/cz_{y}.png', caption=f"RZ map ({y})", use_column_width=True)
-    st.subheader('CZ change map 2012 - 2018')
-    st.image(f'data/images/clms/cz_change_12-18.png', caption=f"CZ change map (2012-2018)", use_column_width=True)
-    st.subheader('CZ change table 2012 - 2018')
-    st.image(f'data/images/clms/cz_change_table_12-18.png', caption=f"CZ change table (2012-2018)", use_column_width=True)
+    year_map('cz', "Select a year : ", "RZ map ({y})")
+    change_maps('cz', 'CZ')
 
     #highlights
     st.subheader('Highlights')
@@ -138,13 +184,8 @@ if page == 'Riparian Zones':
     # rz map
     st.subheader('RZ map')
     # display clc map according to year selected by the user (status + change)
-    years = ['2012', '2018']
-    y = st.selectbox("Select a year :", options=years)
-    st.image(f'data/images/clms/rz_{y}.png', caption=f"RZ map ({y})", use_column_width=True)
-    st.subheader('RZ change map 2012 - 2018')
-    st.image(f'data/images/clms/rz_change_12-18.png', caption=f"RZ change map (2012-2018)", use_column_width=True)
-    st.subheader('RZ change table 2012 - 2018')
-    st.image(f'data/images/clms/rz_change_table_12-18.png', caption=f"RZ change table (2012-2018)", use_column_width=True)
+    year_map('rz', "Select a year :", "RZ map ({y})")
+    change_maps('rz', 'RZ')
 
     #highlights
     st.subheader('Highlights')
@@ -180,13 +221,8 @@ if page == 'Urban Atlas':
     # ua map
     st.subheader('UA map')
     # display clc map according to year selected by the user (status + change)
-    years = ['2012', '2018']
-    y = st.selectbox("Select a year: ", options=years)
-    st.image(f'data/images/clms/ua_{y}.png', caption=f"RZ map ({y})", use_column_width=True)
-    st.subheader('UA change map 2012 - 2018')
-    st.image(f'data/images/clms/ua_change_12-18.png', caption=f"UA change map (2012-2018)", use_column_width=True)
-    st.subheader('UA change table 2012 - 2018')
-    st.image(f'data/images/clms/ua_change_table_12-18.png', caption=f"UA change table (2012-2018)", use_column_width=True)
+    year_map('ua', "Select a year: ", "RZ map ({y})")
+    change_maps('ua', 'UA')
 
     #highlights
     st.subheader('Highlights')
@@ -250,9 +286,7 @@ if page == 'Small Woody Features':
     # swf map
     st.subheader('SWF map')
     # display clc map according to year selected by the user (status)
-    years = ['2015', '2018']
-    y = st.selectbox("Select a year: ", options=years)
-    st.image(f'data/images/clms/swf_{y}.png', caption=f"SWF map ({y})", use_column_width=True)
+    year_map('swf', "Select a year: ", "SWF map ({y})")
 
     # analysis
     st.subheader('Analysis')
@@ -269,19 +303,14 @@ if page == 'Small Woody Features':
 
     # render swf comparison
     image_comparison(
-        img1="data/images/clms/swf_henon_2015_5m.png",
-        img2="data/images/clms/swf_henon_2018_5m.png",
+        img1=image_for("data/images/clms/swf_henon_2015_5m.png"),
+        img2=image_for("data/images/clms/swf_henon_2018_5m.png"),
         label1='SWF 2015',
         label2='SWF 2018',
         show_labels=True
     )
-    # swf omissions / commissions
-    gl_select = st.selectbox("Zoom on SWF data", options=['SWF 2015', 'SWF 2018'])
-    if gl_select == 'SWF 2015':
-        st.image('data/images/clms/swf_henon_2015_5m_err.png')
-    elif gl_select == 'SWF 2018':
-        st.image('data/images/clms/swf_henon_2018_5m_err.png')
-    st.image('data/images/clms/swf_change_legend.png')
+    swf_zoom()
+    show_image('data/images/clms/swf_change_legend.png')
 
     #highlights
     st.subheader('Highlights')
@@ -324,11 +353,10 @@ if page == 'Grassland':
              'from false changes caused by the difference in resolution between the two products.')
     st.subheader('Grassland map')
     # display clc map according to year selected by the user (status + change)
-    years = ['2015', '2018']
-    y = st.selectbox("Select a year:", options=years)
-    st.image(f'data/images/clms/grass_{y}.png', caption=f"RZ map ({y})", use_column_width=True)
+    year_map('grass', "Select a year:", "RZ map ({y})")
     st.subheader('Grassland change map')
-    st.image('data/images/clms/grass_change_15-18.png', caption=f"Grassland change map (2015-2018)", use_column_width=True)
+    grass_change = latest('grass', 'change_map')
+    show_raster(grass_change['path'], caption=f"Grassland change map ({grass_change['start']}-{grass_change['end']})")
 
 
     # analysis
@@ -351,15 +379,15 @@ if page == 'Grassland':
 
     # render grassland comparison
     image_comparison(
-        img1="data/images/clms/grass_2015-zoom.png",
-        img2="data/images/clms/grass_2018-zoom.png",
+        img1=image_for("data/images/clms/grass_2015-zoom.png"),
+        img2=image_for("data/images/clms/grass_2018-zoom.png"),
         label1='Grassland 2015',
         label2='Grassland 2018',
         show_labels=True
     )
     st.caption('<div style="text-align: center">my caption</div>', unsafe_allow_html=True)
 
-    st.image('data/images/clms/grass_change_15-18-zoom.png', caption='Zoom on grassland change map (2015-2018)')
+    show_image('data/images/clms/grass_change_15-18-zoom.png', caption='Zoom on grassland change map (2015-2018)')
 
     #highlights
     st.subheader('Highlights')
@@ -387,21 +415,7 @@ if page == 'Tree Cover Change Mask':
              'unchanged areas with tree cover. These changes are tracked between the 2012/2015 and 2015/2018 reference '
              'years.')
     st.subheader('TCCM map')
-    # display tccm map according to year selected by the user (change)
-    years = ['2012-2015', '2015-2018']
-    y = st.selectbox("Select a year:", options=years).replace('20', '')
-    st.image(f'data/images/clms/tccm_{y}.png', caption=f"TCCM map ({y})", use_column_width=True)
-
-    # barplot grassland change 2015-2018
-    tccm = read_dataframe(f'data/dataframes/tccm_{y}.csv')
-    tccm['Catchment basin'] = tccm['Catchment basin'].astype('int')
-    tccm['Gain'] = tccm['Gain'].astype('float')
-    tccm['Loss'] = tccm['Loss'].astype('float')
-    st.bar_chart(tccm,
-                 x='Catchment basin',
-                 y=['Gain', 'Loss'],
-                 y_label='Surface (ha)',
-                 stack=False)
+    tccm_maps()
 
     #highlights
     st.subheader('Highlights')
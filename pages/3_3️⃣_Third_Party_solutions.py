@@ -1,9 +1,17 @@
 import altair as alt
 import pandas as pd
-from pyogrio import read_dataframe
+from pd2.fragments import section
 import streamlit as st
 from streamlit_image_comparison import image_comparison
-from datetime import datetime, timedelta
+from pd2.calendar import daily_axis, series_frame
+from pd2.charts import crop_chart, ndvi_chart, revisit_timeline
+from pd2.crops import crop_shares, crop_years, cube_basins
+from pd2.ndvi import (DELTA_END, DELTA_START, NDVI_THRESHOLD, load_cover_durations, parcel_cover_days,
+                      parcel_picker, parcel_series, parcel_smoothed)
+from pd2.rasters import show_raster
+from pd2.images import image_for
+from pd2.registry import asset
+from pd2.revisit import acquisitions, longest_gaps, usable_days
 
 # functions
 def generate_box():
@@ -27,29 +35,68 @@ def generate_box():
 )
 
 
-def _ts_str_to_foat(df):
-    new_df = pd.DataFrame(columns=['ida', 'ddc', 'ndvi_raw'])
-    for index, row in df.iterrows():
-        ida = row['ida']
-        ddc = row['ddc']
+# sections : a widget change only reruns the section it belongs to
+@section
+def crop_maps():
+    # crop identification map : user selector
+    selected_year = st.selectbox("Crop identification map : select a year", crop_years())
+    crop_map = asset('crop_id', 'status', selected_year)
+    if crop_map is None:
+        st.info(f'No crop identification map for {selected_year}, only its crop shares below.')
+    else:
+        show_raster(crop_map['path'], caption=f"Map for {selected_year}", attr='© Kermap')
 
-        # smooth
-        if 'ts_mean_raw_s2' in row:
-            ts_list = []
-            sth_string = row['ts_mean_raw_s2'].split(",")
-            for r in sth_string:
-                r = r.replace("[", "")
-                r = r.replace(" ", "")
-                r = r.replace("]", "")
-                flt_sth = float(r)
-                ts_list.append(flt_sth)
+    st.write('The algorithm detects up to 22 types of crops over the european territory, including: wheat, corn, barley, '
+             'rapeseed, soybeans, and in addition to major crops, it enables mapping of the distribution of pastures '
+             'and fallow land and allows monitoring annual changes. ')
 
-        dfi = pd.DataFrame({'ida': ida,
-                            'ddc': ddc,
-                            'ndvi_raw': [ts_list]})
-        new_df = pd.concat([new_df, dfi])
+    # barplot, from the crop areas of the parcels for the years in the cube
+    basins = cube_basins(selected_year)
+    selected_basin = st.selectbox("Catchment basin", ['All'] + basins, disabled=not basins,
+                                  help=None if basins else f'No parcel areas of {selected_year} per basin')
+    shares = crop_shares(selected_year, None if selected_basin == 'All' else [selected_basin])
+    st.altair_chart(crop_chart(shares, selected_year))
+
+
+@section
+def parcel_cover():
+    ida = parcel_picker('Parcel', key='parcel', default="13")
+    if ida is None:
+        return
+    tsi, dates = parcel_series(ida)
+    ts_frame = series_frame(tsi, dates)
+    ts_frame['smoothed'] = parcel_smoothed(ida)
+    # scatter plot, with the whittaker smoothing over the gaps
+    st.altair_chart(ndvi_chart(ts_frame), width='stretch')
+
+    # computed cover duration of the parcel, read from the store when written by the script
+    ddc = parcel_cover_days(ida)
+    season = ts_frame['date'].iloc[DELTA_START], ts_frame['date'].iloc[DELTA_END - 1]
+    st.write(f'Over the cropping year ({season[0]:%d-%m-%Y} - {season[1]:%d-%m-%Y}), the NDVI of parcel {ida} is '
+             f'above {NDVI_THRESHOLD} during {ddc} days once the gaps are interpolated.')
+
+
+@section
+def revisit_gaps():
+    max_cloud = st.slider('Maximum percentage of clouds and cloud shadows for an image to be usable', 0, 100, 30)
+    scenes = acquisitions(max_cloud)
+    # cropping year by default
+    season = daily_axis()[[DELTA_START, DELTA_END - 1]].date
+    start, end = st.slider('Window', min_value=scenes.index[0].date(), max_value=scenes.index[-1].date(),
+                           value=tuple(season), format='DD-MM-YYYY')
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    gaps = longest_gaps(scenes, start, end)
+    st.altair_chart(revisit_timeline(usable_days(scenes, start, end), gaps), width='stretch')
+    st.dataframe(gaps, hide_index=True, column_config={
+        'sensors': 'Sensors',
+        'acquisitions': 'Usable images',
+        'unknown': st.column_config.NumberColumn('Unknown cover (days)',
+                                                 help='Acquired, but no cloud stats that day: not counted as usable'),
+        'longest_gap': st.column_config.NumberColumn('Longest gap (days)'),
+        'gap_start': st.column_config.DateColumn('Gap from', format='DD-MM-YYYY'),
+        'gap_end': st.column_config.DateColumn('Gap to', format='DD-MM-YYYY'),
+    })
 
-    return new_df
 
 # side bar
 st.sidebar.title('Third-party inventory')
@@ -107,40 +154,7 @@ if page == 'Grassland and crops monitoring':
         s += "- " + i + "\n"
     st.markdown(s)
 
-    # load agri stats
-    agri_df = read_dataframe('data/dataframes/agri_stats.csv').astype({
-        'Crop': 'string',
-        '2017 (%)': 'float',
-        '2018 (%)': 'float',
-        '2019 (%)': 'float',
-        '2021 (%)': 'float',
-        '2022 (%)': 'float',
-        '2023 (%)': 'float'
-    })
-
-    # crop identification map : user selector
-    years = [2017, 2018, 2019, 2021, 2022, 2023]
-    images = {
-        2017: 'data/images/third_party/crop_id_2017.png',
-        2018: 'data/images/third_party/crop_id_2018.png',
-        2019: 'data/images/third_party/crop_id_2019.png',
-        2021: 'data/images/third_party/crop_id_2021.png',
-        2022: 'data/images/third_party/crop_id_2022.png',
-        2023: 'data/images/third_party/crop_id_2023.png'
-    }
-    selected_year = st.selectbox("Crop identification map : select a year", years)
-    st.image(images[selected_year], caption=f"Map for {selected_year}", use_column_width=True)
-
-    st.write('The algorithm detects up to 22 types of crops over the european territory, including: wheat, corn, barley, '
-             'rapeseed, soybeans, and in addition to major crops, it enables mapping of the distribution of pastures '
-             'and fallow land and allows monitoring annual changes. ')
-
-    # barplot
-    agri_df = agri_df.sort_values(f'{selected_year} (%)', ascending=False)
-    st.write(alt.Chart(agri_df).mark_bar().encode(
-        x=alt.X('Crop', sort=None),
-        y=f'{selected_year} (%)'
-    ))
+    crop_maps()
 
     st.write('The pixel-based crop classification allows to monitor internal crop and grasslands changes both at '
              'parcel and regional levels. The table below shows the evolution of crop rotation every year. The most '
@@ -223,33 +237,11 @@ if page == 'Crop cover duration':
              'is essential. ')
 
     # s2 cover duration graphics
-    ts_frame_tmp = read_dataframe('data/dataframes/cover_duration.csv')
-    ts_frame_tmp_rfct = _ts_str_to_foat(ts_frame_tmp)
-    tsi = ts_frame_tmp_rfct.loc[ts_frame_tmp_rfct['ida'] == "13"]['ndvi_raw'][0]
-
-    # Manage dates
-    dt = datetime(2022, 9, 1)
-    end = datetime(2023, 11, 1)
-    step = timedelta(days=1)
-    dates_serie = []
-    dates_serie_n = []
-    while dt < end:
-        dates_serie.append(dt.strftime('%Y%m%d'))
-        dates_serie_n.append(dt.strftime('%d-%m-%Y'))
-        dt += step
-    delta_start = 30
-    delta_end = -31
-
-    ts_frame = pd.DataFrame(data={'date': dates_serie_n,
-                                  'ndvi': tsi})
-    ts_frame['date'] = pd.to_datetime(ts_frame['date'], format='%d-%m-%Y')
-
     st.write('The graphic below shows the evolution of cloud-free NDVI observations derived from Sentinel-2 satellites '
              'over the cropping year 2023 (octobre 2022 - october 2023). A big gap is observed between 11-01-2022 and 01-18-2023 '
              'due to important cloud cover during the period. Increasing cadence to (near) daily acquisitions would '
              'increase the change to have more cloud-free images and better follow the evolution of the NDVI.')
-    # scatter plot
-    st.scatter_chart(ts_frame, x='date', y='ndvi')
+    parcel_cover()
 
     st.write('In this case, daily data would offer up-to-date information on crop development, allowing for real-time '
              'monitoring of changes in vegetation cover, growth patterns, and health status. With daily data, it would '
@@ -257,6 +249,21 @@ if page == 'Crop cover duration':
              'during very cloudy periods, reducing uncertainties associated with interpolating data over longer '
              'periods and providing a more precise knowledge of crop dynamics.')
 
+    st.write('The timeline below combines the daily acquisitions of Sentinel-2 and Landsat 8/9 with the cloud cover '
+             'of the Sentinel-2 images. For each sensor combination, it shows the usable images of the selected '
+             'window and highlights the longest period without any of them. The cloud cover is only known from March '
+             'to November: acquisitions of the other days are shown in grey and not counted as usable.')
+    revisit_gaps()
+
+    # cover duration of every parcel, written by scripts/compute_cover_durations.py
+    durations = load_cover_durations()
+    if durations is not None:
+        st.write(f'The distribution below shows the crop cover duration of every parcel available ({len(durations)}).')
+        st.write(alt.Chart(durations).mark_bar().encode(
+            x=alt.X('cover_days:Q', bin=alt.Bin(step=10), title='Crop cover duration (days)'),
+            y=alt.Y('count():Q', title='Parcels')
+        ))
+
     #highlights
     st.subheader('Highlights')
     generate_box()
@@ -334,8 +341,8 @@ if page == 'Hedgerows monitoring':
 
     # render swf/third-party comparison
     image_comparison(
-        img1="data/images/third_party/swf_2015_henon.png",
-        img2="data/images/third_party/tp_vhr_2015_henon.png",
+        img1=image_for("data/images/third_party/swf_2015_henon.png"),
+        img2=image_for("data/images/third_party/tp_vhr_2015_henon.png"),
         label1='SWF 2015',
         label2='Third-party VHRS 2015',
         show_labels=True
@@ -1,6 +1,16 @@
-import geopandas as gpd
-import pandas as pd
-from pyogrio import read_dataframe
+import os
+from pd2.algae import comparable_dates
+from pd2.fusion import fused_previews
+from pd2.calendar import parse_dates
+from pd2.charts import cloud_cover_chart
+from pd2.clouds import available_years, partition_path
+from pd2.data import read_dataframe
+from pd2.fragments import section
+from pd2.layers import load_geojson
+from pd2.tiles import tile_layer, tiles_enabled
+from pd2.images import image_for, show_image
+from pd2.gallery import photo_gallery
+from pd2.surface import MAX_CLOUD, surface_series
 import streamlit as st
 import folium
 from streamlit_folium import st_folium
@@ -31,6 +41,110 @@ def generate_box():
 )
 
 
+# sections : a widget change only reruns the section it belongs to
+@section
+def roi_map():
+    study_map = folium.Map(location=[48.589098, -2.432541],
+                           zoom_start=9,
+                           attr='© OpenStreetMap contributors')
+
+    # layers are served at the resolution of the current zoom (see pd2.layers.PYRAMID),
+    # or as vector tiles in tile server mode (see pd2.tiles)
+    zoom = st.session_state.get('roi_map', {}).get('zoom') or 9
+    roi_layers = folium.FeatureGroup(name='Region of interest')
+
+    # map catchment basin
+    bv_style = {'fillColor': '#C0C0C0', 'color': '#696969'}
+    if tiles_enabled():
+        tile_layer('bv_sb', bv_style,
+                   fields=['BV Ref', 'area_km2'],
+                   aliases=['BV Ref : ', 'Area (km²) : ']).add_to(study_map)
+    else:
+        bv_geom = load_geojson('bv_sb', zoom)
+        folium.GeoJson(bv_geom,
+                       style_function=lambda x: bv_style,
+                       popup=folium.GeoJsonPopup(
+                           fields=['BV Ref', 'area_km2'],
+                           aliases=['BV Ref : ', 'Area (km²) : ']
+                       )).add_to(roi_layers)
+
+    # map roi
+    #folium.Map(roi).add_to(study_map)
+    if tiles_enabled():
+        tile_layer('roi', {'fillColor': '#3388ff', 'color': '#3388ff'}).add_to(study_map)
+    else:
+        roi = load_geojson('roi', zoom)
+        folium.GeoJson(roi).add_to(roi_layers)
+
+    sm = st_folium(study_map, key='roi_map', width=900, height=600,
+                   feature_group_to_add=roi_layers, returned_objects=['zoom'])
+
+
+@section
+def cloud_cover():
+    selected_year = st.selectbox("Select a year : ", available_years())
+    snapshots = f'data/images/algaes/s2_ts_{selected_year}.png'
+    if os.path.exists(snapshots):
+        show_image(snapshots, caption=f'Sentinel-2 images for {selected_year}')
+    if selected_year == '2023':
+        st.markdown(f'The {selected_year} time series shows many cloudy observations, and few images are actually usable during this period.')
+
+    # plot
+    cloud_df = read_dataframe(partition_path(selected_year))
+    cloud_df['date'] = parse_dates(cloud_df['date'])
+    cloud_df['perc_cloud'] = cloud_df['perc_cloud'].astype(float)
+    cloud_df['perc_cloud_norm'] = cloud_df['perc_cloud_norm'].astype(float)
+
+    # let the user select cloud percentage, filtered in the browser (no rerun)
+    st.markdown('Move the cursor below the chart to change the percentage of clouds and cloud shadows covering the sub-region.')
+    # algae surface of the clear enough dates, below the scatter when indices were computed
+    # filled by the indices script, a raster missing from the cache is computed in the server process
+    surface = surface_series(workers=1)
+    surface = surface[surface['date'].dt.year == int(selected_year)]
+    if not surface.empty:
+        st.markdown(f'The lower chart shows the surface of algae detected over the sub-region on the Sentinel-2 images '
+                    f'with less than {MAX_CLOUD} % of clouds.')
+    st.altair_chart(cloud_cover_chart(cloud_df, surface=surface), width='stretch')
+
+
+@section
+def sensor_comparison():
+    # exported comparisons, plus the dates computed by scripts/compute_algae_indices.py
+    exported = parse_dates(['2024-04-20', '2024-06-09', '2024-06-29'])
+    computed = comparable_dates('ndci')
+    dates = sorted(set(exported) | set(computed.index))
+    selected_date = st.selectbox('Select a date : ', dates, format_func=lambda date: f'{date:%m-%d-%Y}')
+
+    if selected_date in computed.index:
+        img1, img2 = computed.loc[selected_date, 's2'], computed.loc[selected_date, 's3']
+        label1, label2 = 'Sentinel-2 NDCI', 'Sentinel-3 NDCI'
+    else:
+        d = f'{selected_date:%Y_%m_%d}'
+        img1, img2 = image_for(f"data/images/algaes/s2_{d}.png"), image_for(f"data/images/algaes/s3_{d}.png")
+        label1, label2 = 'Sentinel-2', 'Sentinel-3'
+
+    # render swf/third-party comparison
+    image_comparison(
+        img1=img1,
+        img2=img2,
+        label1=label1,
+        label2=label2,
+        show_labels=True
+    )
+
+
+@section
+def fused_maps():
+    previews = fused_previews('ndvi')
+    if previews.empty:
+        return
+    st.write('Between two Sentinel-2 acquisitions, the daily Sentinel-3 images can be fused with the last clear '
+             'Sentinel-2 image to estimate the NDVI at 20 m. Move the slider to browse the fused maps.')
+    selected_date = st.select_slider('Fused map date : ', options=list(previews.index),
+                                     format_func=lambda date: f'{date:%m-%d-%Y}')
+    show_image(previews[selected_date], caption=f'S2 / S3 fused NDVI, {selected_date:%m-%d-%Y}')
+
+
 st.title('Algal bloom detection')
 st.header('Description')
 st.write('The intensive farming context of the region of Saint-Brieuc lead to nutrient runoff, contributing to the '
@@ -38,27 +152,13 @@ st.write('The intensive farming context of the region of Saint-Brieuc lead to nu
          'characterized by the rapid proliferation of algae, pose significant threats to biodiversity by depleting '
          'oxygen levels in the water and disrupting aquatic ecosystems. The rotting of the algaes that stagnate also '
          'leads to significant air pollution with hydrogen sulphide, which threaten wildlife and passers-by. ')
-st.image('data/images/algaes/algaes_detection.png', caption='Algaes proliferation detected over Saint-Brieuc bay’s beaches '
+show_image('data/images/algaes/algaes_detection.png', caption='Algaes proliferation detected over Saint-Brieuc bay’s beaches '
                                                      'with S2 satellite (composite S2 image and ground photos) ')
 
 # image gallery
 st.header('Ground photos gallery')
 st.write('These photos were taken during the summer of 2024. They show the amount of green algae that spread over the bay.')
-algaes_l = ['data/images/algaes/algaes1.png',
-            'data/images/algaes/algaes2.png',
-            'data/images/algaes/algaes3.png',
-            'data/images/algaes/algaes4.png',
-            'data/images/algaes/algaes5.jpg',
-            'data/images/algaes/algaes6.jpg',
-            'data/images/algaes/algaes7.jpg',
-            'data/images/algaes/algaes8.jpg',
-            'data/images/algaes/algaes9.jpg',
-            'data/images/algaes/algaes10.jpg']
-
-col1, col2, col3, col4 = st.columns(4)
-for i, im in enumerate(algaes_l):
-    with eval(f'col{i % 3 + 1}'):
-        st.image(im, use_column_width='auto')
+photo_gallery('data/images/algaes', 'algaes', key='algaes_gallery')
 
 # s2 for algal bloom detection
 st.header('Copernicus data for algal blooms monitoring')
@@ -76,56 +176,14 @@ st.write('Copernicus Sentinel-2 imagery can be used to detect algal blooms. By a
 st.subheader('Location of the region of interest')
 st.markdown('A sub-region of interest has been selected to monitor algaes proliferation. It is bordered by the city of '
             'Saint-Brieuc to the west, the city of Yffiniac to the south, and the city of Planguenoual to the east.')
-study_map = folium.Map(location=[48.589098, -2.432541],
-                       zoom_start=9,
-                       attr='© OpenStreetMap contributors')
-
-# map catchment basin
-bv_geom = gpd.read_file('data/geometries/bv_sb-4326.fgb', engine='pyogrio')
-bv_geom['DateCreationOH'] = bv_geom['DateCreationOH'].astype('string')
-bv_geom = bv_geom.rename(columns={'ida': 'BV Ref'})
-bv_geom = bv_geom.to_json()
-bv_style = {'fillColor': '#C0C0C0', 'color': '#696969'}
-folium.GeoJson(bv_geom,
-               style_function=lambda x: bv_style,
-               popup=folium.GeoJsonPopup(
-                   fields=['BV Ref', 'area_km2'],
-                   aliases=['BV Ref : ', 'Area (km²) : ']
-               )).add_to(study_map)
-
-# map roi
-roi = read_dataframe('data/geometries/roi.fgb').to_json()
-#folium.Map(roi).add_to(study_map)
-folium.GeoJson(roi).add_to(study_map)
-
-sm = st_folium(study_map, width=900, height=600)
+roi_map()
 
 # plot s2 time series
 st.subheader('Cloud cover limitation')
 st.markdown('Cloud cover is the main limitation in monitoring of green algaes as they make it impossible to see '
             'surface of the Earth in the optical domain. Through the snapshot time series from March to November 2022 '
             'and 2023, you can visualize the amount of clouds present in the images.')
-selected_year = st.selectbox("Select a year : ", ['2022', '2023'])
-st.image(f'data/images/algaes/s2_ts_{selected_year}.png', caption=f'Sentinel-2 images for {selected_year}')
-if selected_year == '2023':
-    st.markdown(f'The {selected_year} time series shows many cloudy observations, and few images are actually usable during this period.')
-
-# plot
-cloud_df = read_dataframe(f'data/dataframes/cloud_stats_{selected_year}_df.csv')
-cloud_df['date'] = pd.to_datetime(cloud_df['date'])
-cloud_df['perc_cloud'] = cloud_df['perc_cloud'].astype(float)
-cloud_df['perc_cloud_norm'] = cloud_df['perc_cloud_norm'].astype(float)
-
-# let the user select cloud percentage
-selected_perc = st.slider('Move the cursor below to change the percentage of clouds and cloud shadows covering the sud-region : ', min_value=0, max_value=100, value=100)
-cloud23_df_filtered = cloud_df[cloud_df['perc_cloud'] <= selected_perc]
-num_points = len(cloud23_df_filtered)
-st.markdown(f'A total of {num_points} images found with less than {selected_perc} % of clouds.')
-st.scatter_chart(cloud23_df_filtered,
-                 x='date',
-                 y='perc_cloud',
-                 x_label='Date',
-                 y_label='Cloud / cloud shadow (%)')
+cloud_cover()
 
 st.write('The analysis of the time series highlights several critical insights regarding the limitations of Copernicus '
          'Sentinel-2 capabilities in monitoring environmental phenomena such as algal blooms. The graphic above '
@@ -149,17 +207,8 @@ st.write('The "Ulyssys Water Quality Viewer (UWQV)", a custom script for the Sen
 
 st.write('We selected 3 dates where atmospheric conditions were very clear to visualise algaes and compare the ability of '
          'the two sensors to map.')
-selected_date = st.selectbox('Select a date : ', ['04-20-2024', '06-09-2024', '06-29-2024'])
-d = f'{selected_date[-4:]}_{selected_date[0:2]}_{selected_date[3:5]}'
-
-# render swf/third-party comparison
-image_comparison(
-    img1=f"data/images/algaes/s2_{d}.png",
-    img2=f"data/images/algaes/s3_{d}.png",
-    label1='Sentinel-2',
-    label2='Sentinel-3',
-    show_labels=True
-)
+sensor_comparison()
+fused_maps()
 
 st.write("The results indicate that the Sentinel-2, while providing higher spatial resolution, can be less accurate in "
          "detecting algaes due to confusion with sediments, leading to false positives. In contrast, Sentinel-3's "
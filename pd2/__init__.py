@@ -0,0 +1 @@
+"""Shared helpers for the PD2 streamlit pages."""
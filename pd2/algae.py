@@ -0,0 +1,246 @@
+"""Chlorophyll / algae indices of Sentinel-2 and Sentinel-3 scenes over the ROI.
+
+Reads the band rasters of local scenes, Sentinel-2 L2A ``.SAFE`` folders
+(``R20m`` bands, or the same names exported to GeoTIFF) and Sentinel-3 OLCI
+folders of reflectance bands exported to GeoTIFF (e.g. ``Oa08_reflectance.tif``;
+the swath netCDF of the ``.SEN3`` products is not georeferenced). Every band
+is warped onto one grid over the ROI per sensor (``GRID_CRS``, ``RESOLUTION``)
+so that both sensors cover the same extent, then indices are computed with
+NumPy band math on whole arrays.
+
+Pixels flagged by the cloud / shadow mask of the same day (the masks of the
+cloud stats, see ``pd2.clouds``) and pixels outside the ROI are set to NaN.
+Scenes are processed in a pool of worker processes; each index is written as
+a float32 GeoTIFF and a PNG preview under ``ALGAE_DIR``, listed in
+``catalogue.csv``. Dates with both sensors clear enough are offered by the
+sensor comparison of the Algaes page.
+"""
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import rasterio
+import shapely
+from PIL import Image
+from rasterio.enums import Resampling
+from rasterio.features import geometry_mask
+from rasterio.transform import from_origin
+from rasterio.vrt import WarpedVRT
+from rasterio.warp import transform_geom
+from shapely.geometry import mapping, shape
+
+from pd2.calendar import parse_dates
+from pd2.clouds import ROI, list_masks, read_roi, scene_date
+from pd2.data import read_dataframe
+from pd2.pool import map_workers
+
+ALGAE_DIR = 'data/algae'
+CATALOGUE = os.path.join(ALGAE_DIR, 'catalogue.csv')
+CATALOGUE_COLUMNS = ['name', 'sensor', 'date', 'index', 'path', 'preview', 'clear_pct', 'mean']
+
+# utm zone of the S2 tile T30UWU
+GRID_CRS = 'EPSG:32630'
+RESOLUTION = {'s2': 20, 's3': 300}
+
+# sensor -> band -> file name pattern, searched recursively in a scene folder
+BANDS = {
+    's2': {'B04': '*_B04_20m.*', 'B05': '*_B05_20m.*', 'B8A': '*_B8A_20m.*'},
+    's3': {'Oa08': '*Oa08*.tif', 'Oa11': '*Oa11*.tif', 'Oa17': '*Oa17*.tif'},
+}
+
+# index -> (bands a and b of (a - b) / (a + b) per sensor, preview range)
+INDICES = {
+    # normalized difference chlorophyll index, red edge (705-709 nm) against red (665 nm)
+    'ndci': ({'s2': ('B05', 'B04'), 's3': ('Oa11', 'Oa08')}, (-0.2, 0.4)),
+    # stranded / floating green algae
+    'ndvi': ({'s2': ('B8A', 'B04'), 's3': ('Oa17', 'Oa08')}, (-0.2, 0.8)),
+}
+
+# share of ROI pixels with a value for a date to be offered on the page
+MIN_CLEAR = 50
+PREVIEW_WIDTH = 704
+PREVIEW_CMAP = 'viridis'
+
+# processing baselines from 04.00 add 1000 to the S2 L2A digital numbers
+_BASELINE = re.compile(r'_N(\d{4})_')
+
+
+def sensor_of(scene):
+    """'s2' or 's3' from the product name of ``scene``."""
+    name = os.path.basename(os.path.normpath(scene))
+    if name.startswith('S2'):
+        return 's2'
+    if name.startswith('S3'):
+        return 's3'
+    raise ValueError(f'{scene} is neither a Sentinel-2 nor a Sentinel-3 product')
+
+
+def list_scenes(*scene_dirs):
+    """Scene folders of ``scene_dirs`` (S2* / S3* products), sorted."""
+    return sorted(p for d in scene_dirs for p in glob.glob(os.path.join(d, 'S[23]*')) if os.path.isdir(p))
+
+
+def band_paths(scene, sensor):
+    """Path of each band of ``sensor`` in the ``scene`` folder."""
+    paths = {}
+    for band, pattern in BANDS[sensor].items():
+        found = sorted(glob.glob(os.path.join(scene, '**', pattern), recursive=True))
+        if not found:
+            raise ValueError(f'no {band} band ({pattern}) in {scene}')
+        paths[band] = found[0]
+    return paths
+
+
+def roi_grid(roi, sensor):
+    """(transform, width, height, inside) of the ``sensor`` grid covering the ``roi`` WKT."""
+    res = RESOLUTION[sensor]
+    geom = transform_geom('EPSG:4326', GRID_CRS, mapping(shapely.from_wkt(roi)))
+    minx, miny, maxx, maxy = shape(geom).bounds
+    left, top = np.floor(minx / res) * res, np.ceil(maxy / res) * res
+    width, height = int(np.ceil((maxx - left) / res)), int(np.ceil((top - miny) / res))
+    transform = from_origin(left, top, res, res)
+    inside = geometry_mask([geom], out_shape=(height, width), transform=transform, invert=True)
+    return transform, width, height, inside
+
+
+def _warp(path, grid, resampling, dtype='float32', nodata=None):
+    # band read through a warped view on the grid, nodata (the file's, else
+    # ``nodata``, else outside the source) as a mask
+    transform, width, height, _ = grid
+    with rasterio.open(path) as src:
+        nodata = src.nodata if src.nodata is not None else nodata
+        vrt = WarpedVRT(src, crs=GRID_CRS, transform=transform, width=width, height=height,
+                        resampling=resampling, src_nodata=nodata, add_alpha=nodata is None)
+        with vrt:
+            data = vrt.read(1, masked=True)
+        scale, offset = src.scales[0], src.offsets[0]
+    return data.astype(dtype), scale, offset
+
+
+def read_reflectance(scene, sensor, grid):
+    """Reflectance of every band of ``scene`` on ``grid``, NaN where not acquired."""
+    name = os.path.basename(os.path.normpath(scene))
+    baseline = _BASELINE.search(name)
+    bands = {}
+    for band, path in band_paths(scene, sensor).items():
+        # 0 is the fill value of the S2 L2A bands
+        data, scale, offset = _warp(path, grid, Resampling.bilinear, nodata=0 if sensor == 's2' else None)
+        values = data.filled(np.nan)
+        if sensor == 's2':
+            shift = -1000 if baseline and int(baseline[1]) >= 400 else 0
+            values = (values + shift) / 10000
+        else:
+            values = values * scale + offset
+        bands[band] = values
+    return bands
+
+
+def find_mask(scene, mask_dir):
+    """Cloud / shadow mask of ``scene`` in ``mask_dir``, else one of the same day, else None."""
+    if mask_dir is None:
+        return None
+    name = os.path.basename(os.path.normpath(scene))
+    masks = sorted(list_masks(mask_dir))
+    same_scene = [m for m in masks if os.path.basename(m).startswith(name)]
+    same_day = [m for m in masks if scene_date(os.path.basename(m)) == scene_date(name)]
+    return (same_scene or same_day or [None])[0]
+
+
+def cloudy(mask_path, grid):
+    """Pixels of ``grid`` flagged cloud / shadow or not acquired by the mask."""
+    data, _, _ = _warp(mask_path, grid, Resampling.nearest, dtype='uint8')
+    return data.mask | (data.data != 0)
+
+
+def normalized_difference(a, b):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (a - b) / (a + b)
+
+
+def write_preview(values, path, vmin, vmax, width=PREVIEW_WIDTH):
+    """PNG of ``values`` coloured on [vmin, vmax], NaN in white, ``width`` px wide."""
+    from matplotlib import colormaps
+
+    rgba = colormaps[PREVIEW_CMAP](np.clip((values - vmin) / (vmax - vmin), 0, 1), bytes=True)
+    rgba[np.isnan(values)] = 255
+    height = max(1, round(width * values.shape[0] / values.shape[1]))
+    Image.fromarray(rgba[..., :3]).resize((width, height), Image.Resampling.NEAREST).save(path)
+
+
+def write_index(values, stem, transform, index):
+    """Write ``values`` of ``index`` as ``stem``.tif (float32, NaN nodata) and its ``stem``.png preview."""
+    profile = {'driver': 'GTiff', 'width': values.shape[1], 'height': values.shape[0], 'count': 1,
+               'dtype': 'float32', 'crs': GRID_CRS, 'transform': transform, 'nodata': np.nan, 'compress': 'deflate'}
+    with rasterio.open(stem + '.tif', 'w', **profile) as dst:
+        dst.write(values.astype(np.float32), 1)
+    write_preview(values, stem + '.png', *INDICES[index][1])
+
+
+def scene_indices(scene, indices, roi, mask_dir=None, dst_dir=ALGAE_DIR):
+    """Compute and write ``indices`` of one scene, return its catalogue rows."""
+    sensor = sensor_of(scene)
+    name = os.path.basename(os.path.normpath(scene))
+    date = scene_date(name)
+    grid = roi_grid(roi, sensor)
+    bands = read_reflectance(scene, sensor, grid)
+
+    invalid = ~grid[3]
+    mask_path = find_mask(scene, mask_dir)
+    if mask_path is not None:
+        invalid |= cloudy(mask_path, grid)
+
+    rows = []
+    for index in indices:
+        a, b = INDICES[index][0][sensor]
+        values = normalized_difference(bands[a], bands[b])
+        values[invalid] = np.nan
+        stem = os.path.join(dst_dir, f'{sensor}_{index}_{date}')
+        write_index(values, stem, grid[0], index)
+        clear = np.isfinite(values)
+        rows.append({'name': name, 'sensor': sensor, 'date': date, 'index': index,
+                     'path': stem + '.tif', 'preview': stem + '.png',
+                     'clear_pct': 100 * clear.sum() / grid[3].sum(),
+                     'mean': float(values[clear].mean()) if clear.any() else np.nan})
+    return rows
+
+
+def compute_indices(scenes, indices=('ndci',), roi_path=ROI, mask_dir=None, dst_dir=ALGAE_DIR, workers=None):
+    """Indices of every scene folder of ``scenes``, added to the catalogue of ``dst_dir``.
+
+    ``workers`` is passed to ``pd2.pool.map_workers``.
+    Returns the catalogue rows of these scenes.
+    """
+    scenes = sorted(scenes)
+    roi = read_roi(roi_path)
+    os.makedirs(dst_dir, exist_ok=True)
+    args = [(s, list(indices), roi, mask_dir, dst_dir) for s in scenes]
+    results = map_workers(scene_indices, args, workers)
+    rows = pd.DataFrame([r for rows in results for r in rows], columns=CATALOGUE_COLUMNS)
+    update_catalogue(rows, dst_dir)
+    return rows
+
+
+def update_catalogue(rows, dst_dir=ALGAE_DIR):
+    """Add ``rows`` to the catalogue of ``dst_dir``, a recomputed (sensor, date, index) replacing its row."""
+    path = os.path.join(dst_dir, os.path.basename(CATALOGUE))
+    catalogue = pd.read_csv(path) if os.path.exists(path) else None
+    catalogue = pd.concat([catalogue, rows]) if catalogue is not None else rows
+    catalogue = catalogue.drop_duplicates(['sensor', 'date', 'index'], keep='last')
+    catalogue.sort_values(['date', 'sensor', 'index']).to_csv(path, index=False)
+
+
+def comparable_dates(index='ndci', catalogue=CATALOGUE, min_clear=MIN_CLEAR):
+    """Previews of the dates with both an S2 and an S3 ``index`` clear enough.
+
+    Indexed by date, one preview path column per sensor; empty without catalogue.
+    """
+    if not os.path.exists(catalogue):
+        return pd.DataFrame(columns=['s2', 's3'], index=pd.DatetimeIndex([], name='date'))
+    rows = read_dataframe(catalogue)
+    rows = rows[(rows['index'] == index) & (rows['clear_pct'].astype(float) >= min_clear)]
+    previews = rows.pivot_table(index='date', columns='sensor', values='preview', aggfunc='first')
+    previews = previews.reindex(columns=['s2', 's3']).dropna()
+    previews.index = pd.DatetimeIndex(parse_dates(previews.index), name='date')
+    return previews
@@ -0,0 +1,70 @@
+"""Block-streaming reads of large GeoTIFFs.
+
+``iter_blocks`` walks a raster in its own internal blocks (tiles or strips),
+so every read is aligned and decoded once, and skips the blocks that do not
+intersect the clip polygon (by default the 2.5 km buffer of the catchment
+basins). Only one block is held in memory at a time, whatever the raster
+size.
+
+Uncompressed GeoTIFFs can be read memory-mapped: blocks are then views on
+the file at the offsets GDAL reports, with no copy and no decoding.
+"""
+import numpy as np
+import pyogrio
+import rasterio
+import shapely
+from rasterio.windows import bounds as window_bounds
+
+CLIP = 'data/geometries/bv_sb_buf2500-4326.fgb'
+
+
+def read_clip(path, crs):
+    """Union of the polygons of ``path`` in ``crs``, prepared for repeated tests."""
+    clip = pyogrio.read_dataframe(path, columns=[]).to_crs(crs).geometry.union_all()
+    shapely.prepare(clip)
+    return clip
+
+
+def can_mmap(src):
+    """Whether the blocks of ``src`` can be memory-mapped (uncompressed, one band per block)."""
+    return (src.driver == 'GTiff' and src.compression is None
+            and (src.count == 1 or src.interleaving == rasterio.enums.Interleaving.band))
+
+
+def _block_view(mm, src, bidx, ij, window):
+    # block (i, j) as a view on the mapped file, cropped to its window
+    i, j = ij
+    offset = int(src.get_tag_item(f'BLOCK_OFFSET_{j}_{i}', 'TIFF', bidx=bidx) or 0)
+    size = int(src.get_tag_item(f'BLOCK_SIZE_{j}_{i}', 'TIFF', bidx=bidx) or 0)
+    if offset == 0:
+        # sparse file, the block was never written
+        return np.full((window.height, window.width), src.nodata or 0, dtype=src.dtypes[bidx - 1])
+    block_width = src.block_shapes[bidx - 1][1]
+    dtype = np.dtype(src.dtypes[bidx - 1])
+    rows = size // (block_width * dtype.itemsize)
+    block = mm[offset:offset + rows * block_width * dtype.itemsize].view(dtype).reshape(rows, block_width)
+    return block[:window.height, :window.width]
+
+
+def iter_blocks(raster_path, clip=CLIP, bidx=1, mmap=None):
+    """Yield (window, array) for the blocks of band ``bidx`` intersecting ``clip``.
+
+    ``clip`` is a vector file path, None for every block. ``mmap`` reads the
+    blocks memory-mapped (only for uncompressed files), None picks it when
+    possible. Arrays read memory-mapped are read-only views.
+    """
+    with rasterio.open(raster_path) as src:
+        polygon = read_clip(clip, src.crs) if clip is not None else None
+        if mmap is None:
+            mmap = can_mmap(src)
+        elif mmap and not can_mmap(src):
+            raise ValueError(f'{raster_path} is compressed or pixel interleaved, it cannot be memory-mapped')
+        mm = np.memmap(raster_path, dtype=np.uint8, mode='r') if mmap else None
+
+        for ij, window in src.block_windows(bidx):
+            if polygon is not None and not polygon.intersects(shapely.box(*window_bounds(window, src.transform))):
+                continue
+            if mm is not None:
+                yield window, _block_view(mm, src, bidx, ij, window)
+            else:
+                yield window, src.read(bidx, window=window)
@@ -0,0 +1,57 @@
+"""Shared daily date axes for the time series pages.
+
+Every time series (NDVI store, cloud stats, satellite scenes) is put on a
+typed ``DatetimeIndex`` built by ``pd.date_range``, so that series can be
+joined on the same days without formatting dates to strings and back.
+"""
+import numpy as np
+import pandas as pd
+
+from pd2.data import read_dataframe
+
+# daily calendar of the NDVI store
+SEASON_START = '2022-09-01'
+SEASON_END = '2023-10-31'
+SCENES = 'data/dataframes/satellites_scenes.csv'
+SCENES_DATE_FORMAT = '%Y/%m/%d %H:%M:%S'
+
+
+def daily_axis(start=SEASON_START, end=None, periods=None):
+    """Daily ``DatetimeIndex`` named ``date``, from ``start`` to ``end`` or for ``periods`` days."""
+    if end is None and periods is None:
+        end = SEASON_END
+    return pd.date_range(start, end, periods=periods, freq='D', name='date')
+
+
+def as_axis(dates):
+    """``DatetimeIndex`` named ``date`` of an array of dates (e.g. ``datetime64[D]``)."""
+    return pd.DatetimeIndex(np.asarray(dates), name='date')
+
+
+def parse_dates(values, format='ISO8601'):
+    """Typed dates of a column of date strings, in a single vectorized parse."""
+    return pd.to_datetime(values, format=format)
+
+
+def on_axis(frame, axis, column='date', agg='first'):
+    """Rows of ``frame`` put on ``axis`` by their ``column`` date, NaN on the missing days.
+
+    Rows sharing a day (e.g. two tiles of the same pass) are combined with ``agg``.
+    """
+    frame = frame.assign(**{column: parse_dates(frame[column]).dt.normalize()})
+    return frame.groupby(column).agg(agg).reindex(axis)
+
+
+def series_frame(values, dates, name='ndvi'):
+    """Frame of one value per day, ``date`` as a typed column."""
+    return pd.DataFrame({name: values}, index=as_axis(dates)).reset_index()
+
+
+def read_scenes(path=SCENES):
+    """Daily scene calendar: ``scene`` (0 / 1) and ``satellite`` by day, indexed by date."""
+    scenes = read_dataframe(path)
+    scenes['date'] = parse_dates(scenes['date'], SCENES_DATE_FORMAT)
+    scenes['scene'] = scenes['scene'].astype(int)
+    # days without a scene are written 'nan'
+    scenes['satellite'] = scenes['satellite'].astype('string').replace('nan', pd.NA)
+    return scenes.set_index('date')
@@ -0,0 +1,103 @@
+"""Altair charts whose filters run in the browser.
+
+Their sliders are Vega-Lite parameters bound to an input widget: moving one
+re-filters the data already sent with the chart, without a script rerun.
+"""
+import altair as alt
+import pandas as pd
+
+
+def cloud_cover_chart(cloud_df, value=100, surface=None):
+    """Scatter of ``perc_cloud`` by date with a client-side cloud % threshold.
+
+    The count of images under the threshold is drawn above the points. With a
+    ``surface`` frame (``pd2.surface.surface_series``), the algae surface of
+    the same dates is charted below, filtered by the same threshold.
+    """
+    threshold = alt.param(name='max_cloud', value=value, bind=alt.binding_range(
+        min=0, max=100, step=1,
+        name='Percentage of clouds and cloud shadows covering the sub-region : '))
+    data = cloud_df[['date', 'perc_cloud']]
+    # axes stay on the whole season whatever the threshold
+    season = [data['date'].min().isoformat(), data['date'].max().isoformat()]
+    base = alt.Chart(data).transform_filter(alt.datum.perc_cloud <= threshold)
+
+    points = base.mark_circle(size=60).encode(
+        x=alt.X('date:T', title='Date', scale=alt.Scale(domain=season)),
+        y=alt.Y('perc_cloud:Q', title='Cloud / cloud shadow (%)', scale=alt.Scale(domain=[0, 100])),
+        tooltip=[alt.Tooltip('date:T', title='Date'),
+                 alt.Tooltip('perc_cloud:Q', title='Cloud (%)', format='.1f')],
+    )
+    # counted over every image so that an empty selection still reads 0
+    count = alt.Chart(data).transform_calculate(
+        under=alt.expr.if_(alt.datum.perc_cloud <= threshold, 1, 0)
+    ).transform_aggregate(n='sum(under)').transform_calculate(
+        label='"A total of " + datum.n + " images found with less than " + max_cloud + " % of clouds."'
+    ).mark_text(align='left', baseline='bottom', fontSize=14, dx=5).encode(
+        text='label:N', x=alt.value(0), y=alt.value(-8),
+    )
+    if surface is None or surface.empty:
+        return (points + count).add_params(threshold)
+
+    algae = alt.Chart(surface[['date', 'perc_cloud', 'algae_ha']]).transform_filter(
+        alt.datum.perc_cloud <= threshold
+    ).mark_line(point=True, color='#2ca02c').encode(
+        x=alt.X('date:T', title='Date', scale=alt.Scale(domain=season)),
+        y=alt.Y('algae_ha:Q', title='Algae surface (ha)'),
+        tooltip=[alt.Tooltip('date:T', title='Date'),
+                 alt.Tooltip('algae_ha:Q', title='Algae (ha)', format='.1f'),
+                 alt.Tooltip('perc_cloud:Q', title='Cloud (%)', format='.1f')],
+    ).properties(height=150)
+    return alt.vconcat(points + count, algae).add_params(threshold)
+
+
+def revisit_timeline(usable, gaps):
+    """Timeline of the acquisitions per sensor combination, unknown cover in grey, longest gaps highlighted.
+
+    ``usable`` and ``gaps`` are the frames of ``pd2.revisit.usable_days`` and
+    ``pd2.revisit.longest_gaps``.
+    """
+    y = alt.Y('sensors:N', title=None, sort=gaps['sensors'].to_list())
+    # gap bars span whole days, from the first missing day to the next acquisition
+    gaps = gaps.dropna(subset=['gap_start']).assign(gap_stop=lambda g: g['gap_end'] + pd.Timedelta(days=1))
+    bars = alt.Chart(gaps).mark_bar(color='#e45756', opacity=0.4, height=20).encode(
+        x='gap_start:T', x2='gap_stop:T', y=y,
+        tooltip=[alt.Tooltip('sensors:N', title='Sensors'),
+                 alt.Tooltip('longest_gap:Q', title='Longest gap (days)'),
+                 alt.Tooltip('gap_start:T', title='From'), alt.Tooltip('gap_end:T', title='To')],
+    )
+    ticks = alt.Chart(usable).mark_tick(thickness=2, size=20).encode(
+        x=alt.X('date:T', title='Date'), y=y,
+        color=alt.Color('status:N', title='Cloud cover',
+                        scale=alt.Scale(domain=['usable', 'unknown'], range=['#1f77b4', '#bbbbbb'])),
+        tooltip=[alt.Tooltip('date:T', title='Date'), alt.Tooltip('sensors:N', title='Sensors'),
+                 alt.Tooltip('status:N', title='Cloud cover')],
+    )
+    return ticks + bars
+
+
+def ndvi_chart(ts_frame):
+    """NDVI observations by date, with the ``smoothed`` curve drawn over them."""
+    x = alt.X('date:T', title='Date')
+    points = alt.Chart(ts_frame).mark_circle(size=60).encode(
+        x=x, y=alt.Y('ndvi:Q', title='NDVI'),
+        tooltip=[alt.Tooltip('date:T', title='Date'), alt.Tooltip('ndvi:Q', title='NDVI', format='.3f')],
+    )
+    curve = alt.Chart(ts_frame).mark_line(color='#2ca02c').encode(
+        x=x, y='smoothed:Q',
+        tooltip=[alt.Tooltip('date:T', title='Date'), alt.Tooltip('smoothed:Q', title='Smoothed NDVI', format='.3f')],
+    )
+    return points + curve
+
+
+def crop_chart(shares, year):
+    """Share of each crop in ``year`` (``pd2.crops.crop_shares``), largest first, in its crop colour."""
+    shares = shares.sort_values('share', ascending=False)
+    return alt.Chart(shares).mark_bar().encode(
+        x=alt.X('Crop:N', sort=None),
+        y=alt.Y('share:Q', title=f'{year} (%)'),
+        color=alt.Color('Crop:N', scale=alt.Scale(domain=shares['Crop'].to_list(), range=shares['color'].to_list()),
+                        legend=None),
+        tooltip=['Crop:N', alt.Tooltip('share:Q', title='Share (%)', format='.2f'),
+                 alt.Tooltip('area_ha:Q', title='Area (ha)', format=',.0f')],
+    )
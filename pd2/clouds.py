@@ -0,0 +1,155 @@
+"""Cloud cover of Sentinel-2 scenes over the region of interest.
+
+Computes the ``cloud_stats_{year}_df.csv`` tables of the Algaes page from a
+folder of cloud / cloud shadow mask GeoTIFFs, one per scene (e.g.
+``S2X_MSIL2A_20230421T110621_..._T30UWU_....SAFE_umask_492.tif``). Masks are
+read as 0 = clear, any other value = cloud or cloud shadow, and their nodata
+value = outside the acquisition.
+
+Only the window of each mask covering the ROI is read, and scenes are
+processed in a pool of worker processes.
+
+The tables form a store partitioned by year under ``STORE_DIR``, next to an
+index of the scene names already computed: ``ingest_masks`` only computes
+the scenes missing from the index and appends them to their partition.
+"""
+import functools
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pyogrio
+import rasterio
+from rasterio.errors import WindowError
+from rasterio.features import geometry_mask, geometry_window
+from rasterio.warp import transform_geom
+import shapely
+from shapely.geometry import mapping
+
+from pd2.pool import map_workers
+
+ROI = 'data/geometries/roi.fgb'
+COLUMNS = ['name', 'date', 'perc_cloud', 'perc_cloud_norm', 'pf']
+STORE_DIR = 'data/dataframes'
+INDEX = os.path.join(STORE_DIR, 'cloud_stats_index.csv')
+
+_SENSING_DATE = re.compile(r'_(\d{8})T\d{6}_')
+_PARTITION = re.compile(r'cloud_stats_(\d{4})_df\.csv')
+
+
+def scene_date(name):
+    """Sensing date of a Sentinel-2 product name, as YYYY-MM-DD."""
+    match = _SENSING_DATE.search(name)
+    if match is None:
+        raise ValueError(f'no sensing date in {name!r}')
+    d = match[1]
+    return f'{d[:4]}-{d[4:6]}-{d[6:]}'
+
+
+def read_roi(path=ROI):
+    """ROI polygon as WKT in EPSG:4326 (cheap to send to the workers)."""
+    return pyogrio.read_dataframe(path).to_crs(4326).geometry.union_all().wkt
+
+
+@functools.lru_cache(maxsize=8)
+def _roi_in(crs_wkt, roi):
+    # scenes of one tile share a crs, reproject the roi once per worker
+    return transform_geom('EPSG:4326', crs_wkt, mapping(shapely.from_wkt(roi)))
+
+
+def cloud_stats(path, roi):
+    """Row of the cloud stats table for mask ``path`` over the ``roi`` WKT.
+
+    ``perc_cloud`` is the share of ROI pixels flagged cloud / shadow,
+    ``perc_cloud_norm`` the same share among the ROI pixels acquired (not
+    nodata), and ``pf`` is 1 when the ROI has no acquired pixel at all, as
+    for a mask not overlapping the ROI (e.g. a neighbouring tile).
+    """
+    name = os.path.basename(path)
+    with rasterio.open(path) as src:
+        geom = _roi_in(src.crs.to_wkt(), roi)
+        try:
+            window = geometry_window(src, [geom])
+        except WindowError:
+            return {'name': name, 'date': scene_date(name), 'perc_cloud': np.nan, 'perc_cloud_norm': np.nan, 'pf': 1}
+        data = src.read(1, window=window)
+        inside = geometry_mask([geom], out_shape=data.shape, transform=src.window_transform(window),
+                               invert=True)
+        nodata = src.nodata
+
+    n_roi = int(inside.sum())
+    valid = inside if nodata is None else inside & (data != nodata)
+    n_valid = int(valid.sum())
+    n_cloud = int(np.count_nonzero(data[valid]))
+    return {
+        'name': name,
+        'date': scene_date(name),
+        'perc_cloud': 100 * n_cloud / n_roi if n_roi else np.nan,
+        'perc_cloud_norm': 100 * n_cloud / n_valid if n_valid else np.nan,
+        'pf': int(n_valid == 0),
+    }
+
+
+def compute_cloud_stats(paths, roi_path=ROI, workers=None):
+    """Cloud stats table (``COLUMNS``) of the masks ``paths``, sorted by date.
+
+    ``workers`` is passed to ``pd2.pool.map_workers``.
+    """
+    paths = sorted(paths)
+    roi = read_roi(roi_path)
+    rows = map_workers(cloud_stats, [(p, roi) for p in paths], workers)
+    return pd.DataFrame(rows, columns=COLUMNS).sort_values(['date', 'name'], ignore_index=True)
+
+
+def list_masks(mask_dir):
+    return glob.glob(os.path.join(mask_dir, '*.tif'))
+
+
+def partition_path(year, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f'cloud_stats_{year}_df.csv')
+
+
+def available_years(store_dir=STORE_DIR):
+    """Years with a partition in the store, as strings, in order."""
+    return sorted(m[1] for m in map(_PARTITION.fullmatch, os.listdir(store_dir)) if m)
+
+
+def rebuild_index(store_dir=STORE_DIR):
+    """Rewrite the index (name, year) from the partitions of the store."""
+    frames = [pd.read_csv(partition_path(year, store_dir), usecols=['name']).assign(year=year)
+              for year in available_years(store_dir)]
+    index = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['name', 'year'])
+    index.to_csv(os.path.join(store_dir, os.path.basename(INDEX)), index=False)
+    return index
+
+
+def load_index(store_dir=STORE_DIR):
+    """Names of the scenes already in the store."""
+    path = os.path.join(store_dir, os.path.basename(INDEX))
+    if not os.path.exists(path):
+        return set(rebuild_index(store_dir)['name'])
+    return set(pd.read_csv(path, usecols=['name'])['name'])
+
+
+def _append_csv(df, path):
+    df.to_csv(path, mode='a', index=False, header=not os.path.exists(path))
+
+
+def ingest_masks(paths, store_dir=STORE_DIR, roi_path=ROI, workers=None):
+    """Add the masks of ``paths`` missing from the store, return their rows.
+
+    Rows are appended to the partition of their year, then to the index, so
+    a scene is never computed twice and a year is never rewritten.
+    """
+    known = load_index(store_dir)
+    new = [p for p in paths if os.path.basename(p) not in known]
+    stats = compute_cloud_stats(new, roi_path, workers)
+    if stats.empty:
+        return stats
+    stats['year'] = stats['date'].str[:4]
+    for year, rows in stats.groupby('year'):
+        _append_csv(rows[COLUMNS], partition_path(year, store_dir))
+    _append_csv(stats[['name', 'year']], os.path.join(store_dir, os.path.basename(INDEX)))
+    return stats[COLUMNS]
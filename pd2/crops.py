@@ -0,0 +1,158 @@
+"""Crop type statistics of the catchment basins from parcel classification vectors.
+
+Replaces the hand-maintained ``agri_stats.csv`` percentages: every parcel of
+a yearly crop classification vector (one polygon per parcel, its crop label
+in ``CROP_FIELD``) is cut by the basins of ``pd2.zonal``, and the areas of
+the pieces are summed per (basin, crop) with one grouped aggregation (a
+single ``np.bincount``). Parcels are matched to the basins through an STRtree
+and only those crossing a basin border are intersected. Labels outside
+``CROPS`` are counted as ``Other crops``.
+
+The areas form a cube stored as Parquet, partitioned by year under
+``CROP_STORE`` (``year=2023/crop_areas.parquet``). The page only reads the
+partition of the selected year, pivoted once to basins x crops, and sums it
+over the selected basins; years missing from the store are read from the
+``agri_stats.csv`` snapshot. ``crop_years`` lists the years of both.
+"""
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pyogrio
+import shapely
+import streamlit as st
+
+from pd2.data import read_dataframe
+from pd2.pool import map_workers
+from pd2.zonal import BASINS, read_basins
+
+CROP_STORE = 'data/crops'
+SNAPSHOT = 'data/dataframes/agri_stats.csv'
+CROP_FIELD = 'crop'
+OTHER = 'Other crops'
+# lambert-93, equal enough in area over the bay
+AREA_CRS = 'EPSG:2154'
+
+# crop -> chart colour, in the order of the snapshot
+CROPS = {
+    'Wheat': '#f3bb6b', 'Corn': '#ffd057', 'Barley': '#bc987d', 'Other cereals': '#a95626',
+    'Rapeseed': '#dcf767', 'Sunflower': '#fa913b', 'Soya': '#e6cfab', 'Linen': '#5654d3', 'Hemp': '#6018fb',
+    'Rice': '#8ecae4', 'Protein crops': '#b9a998', 'Beetroot': '#e74e91', 'Potato': '#f191a8',
+    'Veget/flowers/herbs': '#badcc9', 'Orchards': '#d44548', 'Citrus': '#ff7527', 'Olive trees': '#91892f',
+    'Vineyards': '#aa3e74', 'Grass/fallow lands': '#50b053', 'Pasture/moors': '#aff2a2', 'Wood': '#008565',
+    OTHER: '#161616',
+}
+SHARE_COLUMNS = ['Crop', 'area_ha', 'share', 'color']
+
+_PARTITION = re.compile(r'year=(\d{4})')
+_SNAPSHOT_YEAR = re.compile(r'(\d{4}) \(%\)')
+
+
+def cube_path(year, store=CROP_STORE):
+    """Parquet partition of ``year`` in the cube."""
+    return os.path.join(store, f'year={year}', 'crop_areas.parquet')
+
+
+def cube_years(store=CROP_STORE):
+    """Years with a partition in the cube, sorted."""
+    paths = glob.glob(cube_path('*', store))
+    return sorted(_PARTITION.search(p)[1] for p in paths)
+
+
+def crop_years(store=CROP_STORE, snapshot=SNAPSHOT):
+    """Years with crop shares, in the cube or in the snapshot table, sorted."""
+    snapshot_years = [m[1] for m in map(_SNAPSHOT_YEAR.fullmatch, read_dataframe(snapshot).columns) if m]
+    return sorted(set(cube_years(store)) | set(snapshot_years))
+
+
+def parcel_crop_areas(parcels_path, basins=BASINS, field=CROP_FIELD):
+    """Area (ha) of each crop per basin of a parcel vector: long frame (basin, crop, area_ha)."""
+    parcels = pyogrio.read_dataframe(parcels_path, columns=[field]).to_crs(AREA_CRS)
+    crops = pd.Categorical(parcels[field].where(parcels[field].isin(list(CROPS)), OTHER), categories=list(CROPS))
+    geoms = parcels.geometry.values
+    ids, basin_geoms = read_basins(basins, AREA_CRS)
+
+    # (parcel, basin) pairs; only the parcels crossing a basin border are cut
+    tree = shapely.STRtree(geoms)
+    basin_i, parcel_i = tree.query(basin_geoms, predicate='intersects')
+    inside = np.zeros(len(parcel_i), dtype=bool)
+    inner_basin, inner_parcel = tree.query(basin_geoms, predicate='contains_properly')
+    inside[np.isin(basin_i * len(geoms) + parcel_i, inner_basin * len(geoms) + inner_parcel)] = True
+    area = shapely.area(geoms)[parcel_i]
+    area[~inside] = shapely.area(shapely.intersection(geoms[parcel_i[~inside]], basin_geoms[basin_i[~inside]]))
+
+    # one bincount over (basin, crop)
+    n_crops = len(CROPS)
+    sums = np.bincount(basin_i * n_crops + crops.codes[parcel_i], weights=area / 1e4,
+                       minlength=len(ids) * n_crops).reshape(len(ids), n_crops)
+    basin, crop = np.nonzero(sums)
+    return pd.DataFrame({'basin': np.asarray(ids, dtype='int16')[basin],
+                         'crop': pd.array(np.array(list(CROPS))[crop], dtype='string'),
+                         'area_ha': sums[basin, crop]})
+
+
+def write_partition(parcels_path, year, store=CROP_STORE, basins=BASINS, field=CROP_FIELD):
+    """Replace the ``year`` partition of the cube with the areas of ``parcels_path``, return its path."""
+    path = cube_path(year, store)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    parcel_crop_areas(parcels_path, basins, field).to_parquet(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def build_cube(parcels, store=CROP_STORE, basins=BASINS, field=CROP_FIELD, workers=None):
+    """Write the partition of every year of ``parcels`` (year -> vector path), return their paths.
+
+    ``workers`` is passed to ``pd2.pool.map_workers``.
+    """
+    args = [(path, year, store, basins, field) for year, path in sorted(parcels.items())]
+    return map_workers(write_partition, args, workers)
+
+
+@st.cache_resource
+def _read_partition(path, mtime):
+    # basins x crops, summed over the selected basins by the page
+    areas = pd.read_parquet(path)
+    return areas.pivot_table(index='basin', columns='crop', values='area_ha', aggfunc='sum', fill_value=0.0)
+
+
+def read_partition(year, store=CROP_STORE):
+    """Crop areas (ha) of ``year``: basin ids as index, ``CROPS`` as columns, once per partition version."""
+    path = cube_path(year, store)
+    return _read_partition(path, os.stat(path).st_mtime_ns).reindex(columns=list(CROPS), fill_value=0.0)
+
+
+def cube_basins(year, store=CROP_STORE):
+    """Basin ids of the ``year`` partition, empty if the year is not in the cube."""
+    if not os.path.exists(cube_path(year, store)):
+        return []
+    return read_partition(year, store).index.to_list()
+
+
+def _snapshot_shares(year, path):
+    snapshot = read_dataframe(path)
+    shares = pd.DataFrame({'Crop': snapshot['Crop'].astype('string'), 'area_ha': np.nan,
+                           'share': snapshot[f'{year} (%)'].astype(float), 'color': snapshot['color']})
+    return shares[SHARE_COLUMNS]
+
+
+def crop_shares(year, basins=None, store=CROP_STORE, snapshot=SNAPSHOT):
+    """Area and share (%) of the classified area of each crop in ``year``, with its chart colour.
+
+    ``basins`` restricts the sum to these basin ids, all basins if None.
+    Years missing from the cube fall back on the snapshot table (all basins
+    only, no areas).
+    """
+    if not os.path.exists(cube_path(year, store)):
+        if basins is not None:
+            raise ValueError(f'no crop areas of {year} per basin in {store}')
+        return _snapshot_shares(year, snapshot)
+
+    areas = read_partition(year, store)
+    areas = (areas if basins is None else areas.reindex(list(basins), fill_value=0.0)).to_numpy().sum(axis=0)
+    total = areas.sum()
+    return pd.DataFrame({'Crop': pd.array(list(CROPS), dtype='string'), 'area_ha': areas,
+                         'share': 100 * areas / total if total else np.zeros(len(areas)),
+                         'color': list(CROPS.values())})
@@ -0,0 +1,84 @@
+"""Shared, memoized access to the files under data/.
+
+Every page reads its tables and geometries through ``read_dataframe`` so that
+a widget change does not hit the disk again. Entries are keyed on the path, its
+modification time and the read options, so a file replaced on disk is picked up
+on the next rerun. The cache lives once per process (``st.cache_resource``),
+is bounded by ``MAX_CACHE_BYTES`` and evicts the least recently used entries.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import pyogrio
+import shapely
+import streamlit as st
+
+MAX_CACHE_BYTES = 256 * 1024 ** 2
+
+
+class DataCache:
+    """Byte-bounded LRU cache of dataframes with hit / miss counters."""
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0].copy()
+            self.misses += 1
+
+        value = loader()
+        size = _nbytes(value)
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (value, size)
+                self.nbytes += size
+                while self.nbytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.nbytes -= evicted
+        # callers are free to mutate what they get back
+        return value.copy()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.nbytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+def _nbytes(df):
+    size = int(df.memory_usage(index=True, deep=True).sum())
+    # geometries only count as object pointers, size them from their coordinates
+    for column in df.columns[df.dtypes == 'geometry']:
+        size += int(shapely.get_num_coordinates(df[column].values).sum()) * 16
+    return size
+
+
+@st.cache_resource
+def get_cache():
+    return DataCache()
+
+
+def read_dataframe(path, **kwargs):
+    """Cached drop-in for ``pyogrio.read_dataframe`` (csv tables and vector files)."""
+    key = (os.path.abspath(path), os.stat(path).st_mtime_ns, tuple(sorted(kwargs.items())))
+    return get_cache().get(key, lambda: pyogrio.read_dataframe(path, **kwargs))
+
+
+def cache_stats():
+    return get_cache().stats()
@@ -0,0 +1,29 @@
+"""Page sections that rerun on their own.
+
+``section`` turns a function into an ``st.fragment``: a widget inside it
+reruns that function only, not the whole page. The wall time of the last run
+of each section is kept in ``TIMINGS`` and logged at debug level, to compare
+with full page reruns (see ``benchmarks/bench_reruns.py``).
+"""
+import functools
+import logging
+import time
+
+import streamlit as st
+
+TIMINGS = {}
+
+_log = logging.getLogger(__name__)
+
+
+def section(func):
+    """``st.fragment`` of ``func`` recording its wall time under its name."""
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            TIMINGS[func.__name__] = elapsed = time.perf_counter() - start
+            _log.debug('section %s ran in %.3f s', func.__name__, elapsed)
+    return st.fragment(timed)
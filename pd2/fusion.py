@@ -0,0 +1,125 @@
+"""Sentinel-2 / Sentinel-3 fusion of the algae indices into daily 20 m maps.
+
+Uses the index rasters of the catalogue of ``pd2.algae``. S2 rasters are
+averaged onto the 300 m S3 grid, and on the dates where both sensors have a
+value (co-clear dates) a linear regression S2 = a + b * S3 is fitted for every
+S3 pixel at once, from sums over the date axis. Pixels with fewer than
+``MIN_PAIRS`` co-clear dates, or no S3 variation, use the regression fitted
+over every pixel.
+
+On a date with an S3 image only, the regression predicts the S2 index at
+300 m; its change from the last co-clear date before it is resampled to 20 m
+and added to the S2 image of that date (the base). S3 dates before the first
+co-clear date are not fused. Dates are processed in a pool
+of worker processes, and every fused map is written with its preview and
+catalogued as sensor ``fused``.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.warp import reproject
+
+from pd2.algae import (ALGAE_DIR, CATALOGUE, CATALOGUE_COLUMNS, GRID_CRS, MIN_CLEAR, roi_grid, update_catalogue,
+                       write_index)
+from pd2.calendar import parse_dates
+from pd2.clouds import ROI, read_roi
+from pd2.data import read_dataframe
+from pd2.pool import map_workers
+
+MIN_PAIRS = 3
+
+
+def _read(path):
+    with rasterio.open(path) as src:
+        return src.read(1), src.transform
+
+
+def to_grid(values, transform, dst_transform, dst_shape, resampling):
+    """``values`` on ``transform`` resampled onto another grid of ``GRID_CRS``, NaN as nodata."""
+    out = np.full(dst_shape, np.nan, dtype=np.float32)
+    reproject(values.astype(np.float32), out, src_transform=transform, src_crs=GRID_CRS, src_nodata=np.nan,
+              dst_transform=dst_transform, dst_crs=GRID_CRS, dst_nodata=np.nan, resampling=resampling)
+    return out
+
+
+def fit_regression(s3, s2, min_pairs=MIN_PAIRS):
+    """Per-pixel (a, b) of s2 = a + b * s3 over the dates (first axis) where both are set."""
+    pairs = np.isfinite(s3) & np.isfinite(s2)
+    x, y = np.where(pairs, s3, 0), np.where(pairs, s2, 0)
+    n = pairs.sum(axis=0)
+    sx, sy, sxx, sxy = x.sum(axis=0), y.sum(axis=0), (x * x).sum(axis=0), (x * y).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        b = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+        a = (sy - b * sx) / n
+
+    # fallback on the regression over every pixel and date
+    gx, gy = s3[pairs], s2[pairs]
+    gb = np.polyfit(gx, gy, 1)[0] if len(gx) > 1 and np.ptp(gx) > 0 else 1.0
+    ga = gy.mean() - gb * gx.mean() if len(gx) else 0.0
+    fallback = (n < min_pairs) | ~np.isfinite(b) | ~np.isfinite(a)
+    return np.where(fallback, ga, a), np.where(fallback, gb, b)
+
+
+def fuse_date(s3_path, base_path, base_low, a, b, stem, index, n_roi):
+    """Fused 20 m map of the S3 image ``s3_path``, written as ``stem``; returns its clear share (%) and mean.
+
+    The clear share is taken over the ``n_roi`` pixels of the S2 ROI grid, as
+    for the index rasters of ``pd2.algae``.
+    """
+    s3, s3_transform = _read(s3_path)
+    base, base_transform = _read(base_path)
+    change = a + b * s3 - base_low
+    values = base + to_grid(change, s3_transform, base_transform, base.shape, Resampling.bilinear)
+    write_index(values, stem, base_transform, index)
+    clear = np.isfinite(values)
+    return 100 * clear.sum() / n_roi, float(values[clear].mean()) if clear.any() else np.nan
+
+
+def fuse(index='ndvi', catalogue=CATALOGUE, dst_dir=ALGAE_DIR, min_clear=MIN_CLEAR, min_pairs=MIN_PAIRS,
+         roi_path=ROI, workers=None):
+    """Fused maps of ``index`` for every S3-only date of the catalogue, return their catalogue rows.
+
+    ``workers`` is passed to ``pd2.pool.map_workers``.
+    """
+    rows = pd.read_csv(catalogue)
+    rows = rows[(rows['index'] == index) & (rows['clear_pct'] >= min_clear)]
+    s2 = rows[rows['sensor'] == 's2'].set_index('date')['path']
+    s3 = rows[rows['sensor'] == 's3'].set_index('date')['path']
+    paired = sorted(s2.index.intersection(s3.index))
+    if not paired:
+        raise ValueError(f'no date with both an S2 and an S3 {index} in {catalogue}')
+
+    # S2 averaged on the S3 grid of every co-clear date
+    s3_pairs = [_read(s3[d]) for d in paired]
+    s3_transform, s3_shape = s3_pairs[0][1], s3_pairs[0][0].shape
+    s2_low = {d: to_grid(*_read(s2[d]), s3_transform, s3_shape, Resampling.average) for d in paired}
+    a, b = fit_regression(np.stack([v for v, _ in s3_pairs]), np.stack([s2_low[d] for d in paired]), min_pairs)
+
+    # last co-clear date before each S3-only date (ISO dates sort as strings)
+    targets = [d for d in sorted(set(s3.index) - set(s2.index)) if d > paired[0]]
+    base = [paired[np.searchsorted(paired, d) - 1] for d in targets]
+    stems = [os.path.join(dst_dir, f'fused_{index}_{d}') for d in targets]
+    n_roi = int(roi_grid(read_roi(roi_path), 's2')[3].sum())
+    args = [(s3[d], s2[t0], s2_low[t0], a, b, stem, index, n_roi) for d, t0, stem in zip(targets, base, stems)]
+    results = map_workers(fuse_date, args, workers)
+
+    fused = pd.DataFrame([{'name': f'{os.path.basename(s3[d])} + {os.path.basename(s2[t0])}', 'sensor': 'fused',
+                           'date': d, 'index': index, 'path': stem + '.tif', 'preview': stem + '.png',
+                           'clear_pct': clear, 'mean': mean}
+                          for d, t0, stem, (clear, mean) in zip(targets, base, stems, results)],
+                         columns=CATALOGUE_COLUMNS)
+    update_catalogue(fused, dst_dir)
+    return fused
+
+
+def fused_previews(index='ndvi', catalogue=CATALOGUE):
+    """Preview of every fused ``index`` map, indexed by date; empty without catalogue."""
+    if not os.path.exists(catalogue):
+        return pd.Series(index=pd.DatetimeIndex([], name='date'), dtype='string', name='preview')
+    rows = read_dataframe(catalogue)
+    rows = rows[(rows['sensor'] == 'fused') & (rows['index'] == index)]
+    return pd.Series(rows['preview'].to_numpy(), name='preview',
+                     index=pd.DatetimeIndex(parse_dates(rows['date']), name='date')).sort_index()
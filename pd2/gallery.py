@@ -0,0 +1,69 @@
+"""Paginated photo gallery.
+
+Photos are discovered from a directory (``<prefix><number>.<ext>``, in number
+order), so new field photos show up without touching the pages. Only the
+thumbnails of the current page are sent to the browser, as small derivatives
+(see ``pd2.images``), and a photo is loaded at full size only when opened.
+"""
+import math
+import os
+import re
+
+import streamlit as st
+
+from pd2.fragments import section
+from pd2.images import CONTENT_WIDTH, show_image
+
+PAGE_SIZE = 12
+COLUMNS = 4
+PHOTO_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+@st.cache_resource
+def _list_photos(directory, prefix, mtime):
+    pattern = re.compile(rf'{re.escape(prefix)}(\d+)$')
+    photos = []
+    for name in os.listdir(directory):
+        stem, ext = os.path.splitext(name)
+        match = pattern.match(stem)
+        if match and ext.lower() in PHOTO_EXTENSIONS:
+            photos.append((int(match[1]), os.path.join(directory, name)))
+    return [path for _, path in sorted(photos)]
+
+
+def list_photos(directory, prefix):
+    """Paths of the ``<prefix><number>`` photos of ``directory``, in number order."""
+    return _list_photos(directory, prefix, os.stat(directory).st_mtime_ns)
+
+
+@st.dialog('Photo', width='large')
+def _open_photo(path):
+    show_image(path, width=CONTENT_WIDTH * 2)
+    st.caption(os.path.basename(path))
+
+
+@section
+def photo_gallery(directory, prefix, key, page_size=PAGE_SIZE, columns=COLUMNS):
+    """Thumbnail grid of the photos of ``directory``, ``page_size`` per page.
+
+    Runs as a fragment: changing page or opening a photo does not rerun the
+    rest of the page.
+    """
+    photos = list_photos(directory, prefix)
+    if not photos:
+        st.info('No photos found.')
+        return
+    n_pages = math.ceil(len(photos) / page_size)
+    page = 1
+    if n_pages > 1:
+        page = st.number_input(f'Page (1-{n_pages}) : ', min_value=1, max_value=n_pages, value=1,
+                               key=f'{key}_page')
+
+    start = (page - 1) * page_size
+    cols = st.columns(columns)
+    for i, path in enumerate(photos[start:start + page_size]):
+        with cols[i % columns]:
+            show_image(path, width=CONTENT_WIDTH // columns, stretch=True)
+            if st.button('Open', key=f'{key}_{start + i}', width='stretch'):
+                _open_photo(path)
+    st.caption(f'Photos {start + 1}-{min(start + page_size, len(photos))} of {len(photos)}')
@@ -0,0 +1,93 @@
+"""Resized WebP / AVIF derivatives of the images under data/images.
+
+``scripts/build_images.py`` writes, for every PNG / JPEG of ``IMAGES_DIR``,
+one file per width of ``WIDTHS`` (below the original width) plus one at the
+original width capped to ``MAX_WIDTH``, in every format of ``FORMATS``, and a
+manifest mapping each original to its derivatives. Pages display images with
+``show_image``, which serves the smallest derivative covering the width it is
+shown at, or the original when it has no derivative.
+"""
+import json
+import os
+
+import streamlit as st
+from PIL import Image
+
+IMAGES_DIR = 'data/images'
+DERIVATIVES_DIR = 'data/images_web'
+MANIFEST = os.path.join(DERIVATIVES_DIR, 'manifest.json')
+WIDTHS = (240, 480, 960, 1440)
+MAX_WIDTH = 1920
+FORMATS = {'webp': {'quality': 82, 'method': 6}, 'avif': {'quality': 60}}
+# st.image cannot fall back between formats, webp is the one every browser reads
+IMAGE_FORMAT = os.environ.get('PD2_IMAGE_FORMAT', 'webp')
+# main column of the centered layout, in css px, and the density served for it
+CONTENT_WIDTH = 704
+PIXEL_RATIO = 2
+
+
+def build_derivatives(path, dst_dir=DERIVATIVES_DIR, images_dir=IMAGES_DIR):
+    """Write the derivatives of image ``path`` and return its manifest entry."""
+    rel = os.path.relpath(path, images_dir)
+    stem = os.path.splitext(rel)[0]
+    with Image.open(path) as im:
+        im.load()
+    # palette images are expanded so the encoders keep transparency
+    im = im.convert('RGBA' if im.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+    widths = sorted({w for w in WIDTHS if w < im.width} | {min(im.width, MAX_WIDTH)})
+    variants = []
+    for width in widths:
+        height = round(im.height * width / im.width)
+        resized = im if width == im.width else im.resize((width, height), Image.Resampling.LANCZOS)
+        files = {}
+        for fmt, options in FORMATS.items():
+            dst = os.path.join(dst_dir, f'{stem}_{width}.{fmt}')
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            resized.save(dst, **options)
+            files[fmt] = os.path.relpath(dst, dst_dir).replace(os.sep, '/')
+        variants.append({'width': width, 'height': height, **files})
+    return rel.replace(os.sep, '/'), {'width': im.width, 'height': im.height, 'variants': variants}
+
+
+def build_manifest(images_dir=IMAGES_DIR, dst_dir=DERIVATIVES_DIR):
+    """Build the derivatives of every PNG / JPEG of ``images_dir`` and write the manifest."""
+    manifest = {}
+    for root, _, files in os.walk(images_dir):
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in ('.png', '.jpg', '.jpeg'):
+                key, entry = build_derivatives(os.path.join(root, name), dst_dir, images_dir)
+                manifest[key] = entry
+    with open(os.path.join(dst_dir, 'manifest.json'), 'w') as f:
+        json.dump(dict(sorted(manifest.items())), f, indent=1)
+    return manifest
+
+
+@st.cache_resource
+def _load_manifest(path, mtime):
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST):
+        return {}
+    return _load_manifest(MANIFEST, os.stat(MANIFEST).st_mtime_ns)
+
+
+def image_for(path, width=CONTENT_WIDTH):
+    """Smallest derivative of ``path`` sharp at ``width`` css px, else ``path``."""
+    entry = load_manifest().get(os.path.relpath(path, IMAGES_DIR).replace(os.sep, '/'))
+    if entry is None:
+        return path
+    variants = [v for v in entry['variants'] if IMAGE_FORMAT in v]
+    if not variants:
+        return path
+    fitting = [v for v in variants if v['width'] >= width * PIXEL_RATIO]
+    variant = fitting[0] if fitting else variants[-1]
+    return os.path.join(DERIVATIVES_DIR, variant[IMAGE_FORMAT])
+
+
+def show_image(path, width=CONTENT_WIDTH, stretch=False, **kwargs):
+    """``st.image`` of the derivative of ``path`` fitting ``width`` css px, ``stretch`` to fill its container."""
+    return st.image(image_for(path, width), width='stretch' if stretch else 'content', **kwargs)
@@ -0,0 +1,111 @@
+"""Ready-to-serve GeoJSON for the folium study maps.
+
+``scripts/build_geojson.py`` writes, for every entry of ``LAYERS``, one
+attribute-trimmed GeoJSON per level of ``PYRAMID`` into ``GEOJSON_DIR``. Pages
+then call ``load_geojson`` with the current map zoom, which reads each file
+once per process instead of rebuilding it from the FlatGeobuf.
+"""
+import math
+import os
+
+import numpy as np
+import pyogrio
+import shapely
+import streamlit as st
+
+GEOJSON_DIR = 'data/geojson'
+
+# name -> source file, column renaming and the popup fields kept in the output
+LAYERS = {
+    'bv_sb': {
+        'src': 'data/geometries/bv_sb-4326.fgb',
+        'rename': {'ida': 'BV Ref'},
+        'fields': ['BV Ref', 'area_km2'],
+    },
+    'n2000_sb': {
+        'src': 'data/geometries/n2000_sb-4326.fgb',
+        'rename': {},
+        'fields': ['SITECODE', 'SITENAME', 'SITETYPE'],
+    },
+    'roi': {
+        'src': 'data/geometries/roi.fgb',
+        'rename': {},
+        'fields': [],
+    },
+}
+
+
+# (min zoom, simplification tolerance in degrees), from coarse to full resolution.
+# Tolerances are about half a screen pixel at the level's min zoom.
+PYRAMID = [
+    (0, 0.001),
+    (11, 0.0003),
+    (13, 0.0001),
+    (15, 0.0),
+]
+
+
+def level_for_zoom(zoom=None):
+    """Index in ``PYRAMID`` of the level to serve at ``zoom`` (full resolution if None)."""
+    if zoom is None:
+        return len(PYRAMID) - 1
+    return max(i for i, (min_zoom, _) in enumerate(PYRAMID) if zoom >= min_zoom)
+
+
+def geojson_path(name, level, dst_dir=GEOJSON_DIR):
+    return os.path.join(dst_dir, f'{name}_{level}.geojson')
+
+
+def simplify(geoms, tolerance):
+    """Simplify polygons keeping shared edges between neighbours in place.
+
+    Coverage simplification is used when the features form a valid coverage
+    (catchment basins), otherwise each geometry is simplified on its own.
+    """
+    if tolerance == 0:
+        return geoms
+    if shapely.coverage_is_valid(geoms):
+        simple = shapely.coverage_simplify(geoms, tolerance)
+    else:
+        simple = shapely.simplify(geoms, tolerance, preserve_topology=True)
+    # drop the digits below the tolerance, they only weigh on the payload
+    decimals = math.ceil(-math.log10(tolerance / 10))
+    simple = shapely.set_precision(simple, 10 ** -decimals)
+    return shapely.transform(simple, lambda coords: np.round(coords, decimals))
+
+
+def read_layer(name):
+    """Source features of layer ``name`` reduced to its popup fields."""
+    layer = LAYERS[name]
+    source_names = {v: k for k, v in layer['rename'].items()}
+    geom = pyogrio.read_dataframe(layer['src'], columns=[source_names.get(f, f) for f in layer['fields']])
+    return geom.rename(columns=layer['rename'])[layer['fields'] + ['geometry']]
+
+
+def build_geojson(name, dst_dir=GEOJSON_DIR):
+    """Write the trimmed GeoJSON of layer ``name`` at every level and return the paths."""
+    geom = read_layer(name)
+    os.makedirs(dst_dir, exist_ok=True)
+    paths = []
+    for level, (_, tolerance) in enumerate(PYRAMID):
+        path = geojson_path(name, level, dst_dir)
+        with open(path, 'w') as f:
+            f.write(geom.set_geometry(simplify(geom.geometry.values, tolerance)).to_json(drop_id=True))
+        paths.append(path)
+    return paths
+
+
+@st.cache_resource
+def _load_geojson(path, mtime):
+    with open(path) as f:
+        return f.read()
+
+
+def load_geojson(name, zoom=None):
+    """GeoJSON text of layer ``name`` at the pyramid level matching ``zoom``.
+
+    Text rather than a parsed mapping: folium writes styles into the features
+    it is given, and the cached value is shared by every session.
+    """
+    path = geojson_path(name, level_for_zoom(zoom))
+    return _load_geojson(path, os.stat(path).st_mtime_ns)
@@ -0,0 +1,338 @@
+"""NDVI time series helpers for the crop cover duration page.
+
+``cover_duration`` computes the crop cover duration (``ddc``, in days) of
+every row of a parcels x days NDVI matrix at once: gaps between clear
+observations are filled by linear interpolation along the day axis, then the
+days of the cropping year where the NDVI is above ``NDVI_THRESHOLD`` are
+counted. ``store_cover_duration`` runs it over a whole store by chunks of
+rows, in a pool of worker processes, and ``write_cover_durations`` keeps the
+result as ``cover_days.npy`` next to the store for the page to read.
+
+``whittaker`` smooths every row at once with a Whittaker smoother (second
+order differences), weighting the missing days 0: the banded system of each
+row is solved by a pentadiagonal LDL decomposition vectorized over the rows.
+``store_whittaker`` writes the smoothed matrix of a store by chunks of rows.
+"""
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from pd2.pool import map_workers
+
+# dense store converted from data/dataframes/cover_duration.csv
+NDVI_STORE = 'data/ndvi/cover_duration'
+
+# cropping year inside the series (1 october - 30 september), in days from
+# the first and last day of the store
+DELTA_START = 30
+DELTA_END = -31
+# covered above this NDVI, the closest to the precomputed ddc of the sample parcel
+NDVI_THRESHOLD = 0.27
+CHUNK_ROWS = 16384
+# whittaker smoothing strength, in days² (larger is smoother)
+WHITTAKER_LAMBDA = 1000
+# above this many parcels the picker takes a typed id instead of a list
+PICKER_OPTIONS = 1000
+
+
+def parse_ndvi_series(df, column='ts_mean_raw_s2'):
+    """Decode the stringified NDVI series of every parcel at once.
+
+    Returns a ``(parcels, ndvi)`` tuple: ``parcels`` holds the ``ida`` / ``ddc``
+    columns and ``ndvi`` is a float32 array of shape parcels x days, row ``i``
+    being the series of ``parcels.iloc[i]``.
+    """
+    parcels = df[['ida', 'ddc']].reset_index(drop=True)
+    if parcels.empty:
+        return parcels, np.empty((0, 0), dtype=np.float32)
+
+    # one csv line per parcel, parsed in a single pass by the C reader;
+    # missing or empty series are left as rows of NaN
+    lines = df[column].astype('string').str.strip().str.strip('[]').reset_index(drop=True)
+    present = (lines.notna() & (lines != '')).to_numpy()
+    if not present.any():
+        return parcels, np.full((len(parcels), 0), np.nan, dtype=np.float32)
+    values = pd.read_csv(io.StringIO('\n'.join(lines[present])),
+                         header=None,
+                         dtype=np.float32,
+                         skipinitialspace=True).to_numpy()
+    ndvi = np.full((len(parcels), values.shape[1]), np.nan, dtype=np.float32)
+    ndvi[present] = values
+    return parcels, ndvi
+
+
+def write_ndvi_store(path, parcels, ndvi, dates):
+    """Write parsed NDVI series as a dense, memory-mappable store.
+
+    The store is a directory holding ``parcels.csv`` (ida / ddc, one line per
+    row of the matrix), ``ndvi.npy`` (float32, parcels x days) and
+    ``dates.npy`` (datetime64[D], the day axis).
+    """
+    if ndvi.shape != (len(parcels), len(dates)):
+        raise ValueError(f'ndvi shape {ndvi.shape} does not match '
+                         f'{len(parcels)} parcels x {len(dates)} days')
+    os.makedirs(path, exist_ok=True)
+    parcels.to_csv(os.path.join(path, 'parcels.csv'), index=False)
+    np.save(os.path.join(path, 'ndvi.npy'), np.ascontiguousarray(ndvi, dtype=np.float32))
+    np.save(os.path.join(path, 'dates.npy'), np.asarray(dates, dtype='datetime64[D]'))
+
+
+def load_ndvi_store(path=NDVI_STORE):
+    """Open a store written by ``write_ndvi_store``.
+
+    Returns ``(parcels, ndvi, dates)``. ``ndvi`` is memory-mapped read-only, so
+    only the rows that are indexed are actually read from disk.
+    """
+    parcels = pd.read_csv(os.path.join(path, 'parcels.csv'), dtype='string')
+    ndvi = np.load(os.path.join(path, 'ndvi.npy'), mmap_mode='r')
+    dates = np.load(os.path.join(path, 'dates.npy'))
+    return parcels, ndvi, dates
+
+
+@st.cache_resource
+def _parcel_index(path, mtime):
+    parcels, ndvi, dates = load_ndvi_store(path)
+    index = pd.Index(parcels['ida'], name='ida')
+    if not index.is_unique:
+        raise ValueError(f'{path} has duplicated parcel ids')
+    return index, ndvi, dates
+
+
+def parcel_index(path=NDVI_STORE):
+    """Parcel ids of a store as a hashed index: ``get_loc(ida)`` is the row of its series."""
+    return _parcel_index(path, os.stat(os.path.join(path, 'ndvi.npy')).st_mtime_ns)[0]
+
+
+def parcel_series(ida, path=NDVI_STORE):
+    """NDVI series of parcel ``ida`` and the dates of the store.
+
+    Only that row is read from the memory-mapped matrix. Raises KeyError for
+    an unknown id.
+    """
+    index, ndvi, dates = _parcel_index(path, os.stat(os.path.join(path, 'ndvi.npy')).st_mtime_ns)
+    return np.array(ndvi[index.get_loc(ida)]), dates
+
+
+def parcel_picker(label, key, default=None, path=NDVI_STORE):
+    """Widget picking a parcel id of the store, None if the typed id is unknown.
+
+    Small stores get a select box; large ones a text input checked against
+    the index, so the browser is not sent every id.
+    """
+    index = parcel_index(path)
+    if default not in index:
+        default = index[0]
+    if len(index) <= PICKER_OPTIONS:
+        return st.selectbox(label, index, index=index.get_loc(default), key=key)
+    ida = st.text_input(label, value=default, key=key).strip()
+    if ida not in index:
+        st.warning(f'No parcel {ida} in the NDVI series.')
+        return None
+    return ida
+
+
+def interpolate_gaps(ndvi):
+    """Linear interpolation of the NaN gaps of each row of ``ndvi`` (parcels x days).
+
+    Days before the first or after the last clear observation of a row stay NaN.
+    """
+    ndvi = np.asarray(ndvi, dtype=np.float32)
+    days = np.arange(ndvi.shape[1], dtype=np.int32)
+    valid = ~np.isnan(ndvi)
+    # previous and next clear day of every day, -1 / n_days when there is none
+    prev = np.maximum.accumulate(np.where(valid, days, -1), axis=1)
+    nxt = np.minimum.accumulate(np.where(valid, days, len(days))[:, ::-1], axis=1)[:, ::-1]
+    inside = (prev >= 0) & (nxt < len(days))
+    prev, nxt = np.where(inside, prev, 0), np.where(inside, nxt, 0)
+
+    before = np.take_along_axis(ndvi, prev, axis=1)
+    after = np.take_along_axis(ndvi, nxt, axis=1)
+    span = np.maximum(nxt - prev, 1)
+    filled = before + (after - before) * ((days - prev) / span).astype(np.float32)
+    return np.where(inside, filled, np.nan)
+
+
+def cover_duration(ndvi, threshold=NDVI_THRESHOLD, delta_start=DELTA_START, delta_end=DELTA_END):
+    """Crop cover duration (days) of each row of ``ndvi`` over the cropping year.
+
+    A day is covered when the interpolated NDVI is at or above ``threshold``;
+    the days between ``delta_start`` and ``delta_end`` (as slice bounds) count.
+    """
+    filled = interpolate_gaps(ndvi)[:, delta_start:delta_end]
+    return (filled >= threshold).sum(axis=1, dtype=np.int16)
+
+
+def _cover_duration_chunk(path, start, stop, threshold, delta_start, delta_end):
+    ndvi = np.load(os.path.join(path, 'ndvi.npy'), mmap_mode='r')
+    return cover_duration(ndvi[start:stop], threshold, delta_start, delta_end)
+
+
+def store_cover_duration(path=NDVI_STORE, threshold=NDVI_THRESHOLD, delta_start=DELTA_START,
+                         delta_end=DELTA_END, workers=None):
+    """``cover_duration`` of every parcel of a store, in the order of its ``parcels``.
+
+    ``workers`` is passed to ``pd2.pool.map_workers``.
+    """
+    n_parcels = np.load(os.path.join(path, 'ndvi.npy'), mmap_mode='r').shape[0]
+    chunks = [(r, min(r + CHUNK_ROWS, n_parcels)) for r in range(0, n_parcels, CHUNK_ROWS)]
+    args = [(path, start, stop, threshold, delta_start, delta_end) for start, stop in chunks]
+    results = map_workers(_cover_duration_chunk, args, workers)
+    return np.concatenate(results) if results else np.empty(0, dtype=np.int16)
+
+
+def whittaker(ndvi, lam=WHITTAKER_LAMBDA):
+    """Whittaker smoothing of each row of ``ndvi`` (parcels x days), NaN as missing days.
+
+    Solves (W + lam D'D) z = W y for every row, W being 1 on the observed days
+    and D the second differences. Days before the first or after the last
+    observation of a row, and rows with fewer than 3 observations, are NaN.
+    """
+    y = np.asarray(ndvi, dtype=np.float64)
+    w = np.isfinite(y)
+    n_rows, n = y.shape
+    enough = w.sum(axis=1) >= 3
+    # unobserved rows are solved with unit weights, then blanked
+    w = np.where(enough[:, None], w, True).astype(np.float64)
+    r = np.where(np.isfinite(y), y, 0) * w
+
+    # bands of D'D: main diagonal, first and second off-diagonals, summed over
+    # the n - 2 rows (1, -2, 1) of D so that short series get them right too
+    m = max(n - 2, 0)
+    dtd = np.zeros(n)
+    for k, square in enumerate((1, 4, 1)):
+        dtd[k:k + m] += square
+    off1 = np.zeros(max(n - 1, 0))
+    off1[:m] -= 2
+    off1[1:m + 1] -= 2
+    a = w + lam * dtd
+    b = lam * off1
+    c = lam
+
+    # A = L D L' with e / f the first / second subdiagonals of L
+    d = np.empty((n_rows, n))
+    e = np.zeros((n_rows, n))
+    f = np.zeros((n_rows, n))
+    for i in range(n):
+        d[:, i] = a[:, i]
+        if i >= 1:
+            d[:, i] -= e[:, i - 1] ** 2 * d[:, i - 1]
+        if i >= 2:
+            d[:, i] -= f[:, i - 2] ** 2 * d[:, i - 2]
+        if i < n - 1:
+            e[:, i] = b[i] - (f[:, i - 1] * e[:, i - 1] * d[:, i - 1] if i >= 1 else 0)
+            e[:, i] /= d[:, i]
+        if i < n - 2:
+            f[:, i] = c / d[:, i]
+
+    # L u = r, then L' z = u / d
+    u = r
+    for i in range(1, n):
+        u[:, i] -= e[:, i - 1] * u[:, i - 1] + (f[:, i - 2] * u[:, i - 2] if i >= 2 else 0)
+    z = u / d
+    for i in range(n - 2, -1, -1):
+        z[:, i] -= e[:, i] * z[:, i + 1] + (f[:, i] * z[:, i + 2] if i < n - 2 else 0)
+
+    days = np.arange(n)
+    observed = np.isfinite(y)
+    first = np.where(observed.any(axis=1), observed.argmax(axis=1), n)
+    last = n - 1 - observed[:, ::-1].argmax(axis=1)
+    inside = (days >= first[:, None]) & (days <= last[:, None]) & enough[:, None]
+    return np.where(inside, z, np.nan).astype(np.float32)
+
+
+def _whittaker_chunk(path, dst, start, stop, lam):
+    ndvi = np.load(os.path.join(path, 'ndvi.npy'), mmap_mode='r')
+    out = np.load(dst, mmap_mode='r+')
+    out[start:stop] = whittaker(ndvi[start:stop], lam)
+    out.flush()
+
+
+def store_whittaker(path=NDVI_STORE, lam=WHITTAKER_LAMBDA, workers=None):
+    """Write the ``whittaker`` smoothing of a store as ``smooth.npy`` next to its ``ndvi.npy``.
+
+    Rows are smoothed by chunks straight into the memory-mapped output, so
+    memory stays bounded whatever the number of parcels. ``workers`` is
+    passed to ``pd2.pool.map_workers``.
+    """
+    shape = np.load(os.path.join(path, 'ndvi.npy'), mmap_mode='r').shape
+    dst = os.path.join(path, 'smooth.npy')
+    # written aside, the page never reads a half smoothed store
+    tmp = dst + '.tmp.npy'
+    np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=shape).flush()
+    chunks = [(r, min(r + CHUNK_ROWS, shape[0])) for r in range(0, shape[0], CHUNK_ROWS)]
+    args = [(path, tmp, start, stop, lam) for start, stop in chunks]
+    map_workers(_whittaker_chunk, args, workers)
+    os.replace(tmp, dst)
+    return dst
+
+
+def _derived_mtime(path, name):
+    # mtime of a file derived from the store, None if missing or older than its ndvi
+    derived = os.path.join(path, name)
+    if not os.path.exists(derived):
+        return None
+    mtime = os.stat(derived).st_mtime_ns
+    return mtime if mtime >= os.stat(os.path.join(path, 'ndvi.npy')).st_mtime_ns else None
+
+
+@st.cache_resource
+def _derived(path, name, mtime):
+    return np.load(os.path.join(path, name), mmap_mode='r')
+
+
+def _parcel_row(ida, path):
+    return _parcel_index(path, os.stat(os.path.join(path, 'ndvi.npy')).st_mtime_ns)[0].get_loc(ida)
+
+
+def parcel_smoothed(ida, path=NDVI_STORE):
+    """Whittaker smoothing of parcel ``ida``.
+
+    Read from the ``smooth.npy`` of ``store_whittaker`` when it is newer than
+    the NDVI of the store, else smoothed from the series with the default
+    ``WHITTAKER_LAMBDA``.
+    """
+    mtime = _derived_mtime(path, 'smooth.npy')
+    if mtime is not None:
+        return np.array(_derived(path, 'smooth.npy', mtime)[_parcel_row(ida, path)])
+    return whittaker(parcel_series(ida, path)[0][None])[0]
+
+
+def write_cover_durations(path=NDVI_STORE, threshold=NDVI_THRESHOLD, delta_start=DELTA_START,
+                          delta_end=DELTA_END, workers=None):
+    """Write the ``store_cover_duration`` of a store as ``cover_days.npy`` next to its ``ndvi.npy``."""
+    dst = os.path.join(path, 'cover_days.npy')
+    np.save(dst + '.tmp.npy', store_cover_duration(path, threshold, delta_start, delta_end, workers))
+    os.replace(dst + '.tmp.npy', dst)
+    return dst
+
+
+def parcel_cover_days(ida, path=NDVI_STORE):
+    """Cover duration of parcel ``ida``.
+
+    Read from the ``cover_days.npy`` of ``write_cover_durations`` when it is
+    newer than the NDVI of the store, else computed from that series alone
+    with the default threshold and cropping year.
+    """
+    mtime = _derived_mtime(path, 'cover_days.npy')
+    if mtime is not None:
+        return int(_derived(path, 'cover_days.npy', mtime)[_parcel_row(ida, path)])
+    return int(cover_duration(parcel_series(ida, path)[0][None])[0])
+
+
+@st.cache_resource
+def _cover_durations(path, mtime):
+    parcels = pd.read_csv(os.path.join(path, 'parcels.csv'), dtype='string')
+    return parcels.assign(cover_days=np.load(os.path.join(path, 'cover_days.npy')))
+
+
+def load_cover_durations(path=NDVI_STORE):
+    """Parcels of a store with their cover duration (``cover_days``) from ``cover_days.npy``.
+
+    None when that file is missing or older than the NDVI of the store: the
+    page never computes the whole store.
+    """
+    mtime = _derived_mtime(path, 'cover_days.npy')
+    return None if mtime is None else _cover_durations(path, mtime)
@@ -0,0 +1,16 @@
+"""Process pool of the batch computations (cloud stats, zonal stats, NDVI store...).
+
+Every batch function takes a ``workers`` argument handed to ``map_workers``:
+None uses every CPU, 1 runs in the current process, as does a single task
+(nothing to pickle, and easier to debug).
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+
+def map_workers(func, args, workers=None):
+    """``[func(*a) for a in args]``, computed in a pool of ``workers`` processes."""
+    args = list(args)
+    if workers == 1 or len(args) < 2:
+        return [func(*a) for a in args]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, *zip(*args)))
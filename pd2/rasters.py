@@ -0,0 +1,61 @@
+"""Tiled display of the CLMS and third-party map layers.
+
+The map layers of the CLMS and third-party pages are exported PNG layouts.
+Once the source rasters are converted to Cloud-Optimized GeoTIFFs with
+``scripts/convert_cogs.py`` (``data/cogs/<image name>.tif``), ``show_raster``
+serves them through localtileserver on a pannable leafmap map, so the browser
+only fetches the tiles in view. Layers without a COG keep their PNG.
+"""
+import logging
+import os
+
+import streamlit as st
+from rasterio.errors import RasterioError
+from streamlit_folium import st_folium
+
+from pd2.images import show_image
+
+COG_DIR = 'data/cogs'
+# study area, as on the folium maps of the Introduction page
+CENTER = [48.589098, -2.432541]
+
+_log = logging.getLogger(__name__)
+
+
+def cog_path(image):
+    """COG converted for the PNG layer ``image`` (which may not exist)."""
+    name = os.path.splitext(os.path.basename(image))[0]
+    return os.path.join(COG_DIR, f'{name}.tif')
+
+
+@st.cache_resource
+def _tile_client(path, mtime):
+    from localtileserver import TileClient
+    return TileClient(path)
+
+
+def show_raster(image, caption, attr='© Copernicus Land Monitoring Service'):
+    """Display the COG of ``image`` as a tiled map, or ``image`` itself if not converted."""
+    path = cog_path(image)
+    if not os.path.exists(path):
+        show_image(image, caption=caption, stretch=True)
+        return
+
+    import leafmap.foliumap as leafmap
+    from localtileserver import get_folium_tile_layer
+
+    try:
+        client = _tile_client(path, os.stat(path).st_mtime_ns)
+        layer = get_folium_tile_layer(client, name=caption, attr=attr)
+    except (RasterioError, OSError):
+        # unreadable COG (RasterioIOError) or tile server down (requests errors are OSErrors),
+        # the PNG layout still shows the layer
+        _log.warning('could not serve %s, showing %s instead', path, image, exc_info=True)
+        show_image(image, caption=caption, stretch=True)
+        return
+    raster_map = leafmap.Map(center=CENTER, zoom=10, draw_control=False, measure_control=False,
+                             toolbar_control=False)
+    layer.add_to(raster_map)
+    # tiles are fetched by the browser, the map never needs to rerun the page
+    st_folium(raster_map, key=path, height=600, use_container_width=True, returned_objects=[])
+    st.caption(caption)
@@ -0,0 +1,90 @@
+"""Registry of the product images shown by the CLMS and third-party pages.
+
+``data/registry.json`` lists, for every map and table image, its product
+(``clc``, ``cz``, ``crop_id``...), its kind (``status``, ``change_map``,
+``change_table``), its reference year (the end year for changes), the years
+it covers and its path. Pages look assets up by (product, kind, year)
+instead of scanning the image folders and parsing file names. The registry
+is built from the file names by ``scripts/build_registry.py``, or at startup
+when missing; a new product year only needs a registry entry.
+"""
+import json
+import os
+import re
+
+import streamlit as st
+
+REGISTRY = 'data/registry.json'
+IMAGE_DIRS = ['data/images/clms', 'data/images/third_party']
+
+# file name stem -> kind, tried in order
+PATTERNS = [
+    (re.compile(r'(?P<product>[a-z]+)_change_table_(?P<start>\d\d)-(?P<end>\d\d)'), 'change_table'),
+    (re.compile(r'(?P<product>[a-z]+)_change(?:_map)?_(?P<start>\d\d)-(?P<end>\d\d)'), 'change_map'),
+    (re.compile(r'(?P<product>[a-z]+)_(?P<start>\d\d)-(?P<end>\d\d)'), 'change_map'),
+    (re.compile(r'(?P<product>[a-z_]+)_(?P<start>\d{4})'), 'status'),
+]
+
+
+def _full_year(year):
+    if len(year) == 4:
+        return year
+    return f'19{year}' if int(year) >= 50 else f'20{year}'
+
+
+def parse_asset(path):
+    """Registry entry of image ``path``, None if its name follows no pattern."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    for pattern, kind in PATTERNS:
+        match = pattern.fullmatch(stem)
+        if match:
+            start = _full_year(match['start'])
+            end = _full_year(match.groupdict().get('end') or match['start'])
+            return {'product': match['product'], 'kind': kind, 'year': end, 'start': start, 'end': end,
+                    'path': path.replace(os.sep, '/')}
+    return None
+
+
+def build_registry(image_dirs=IMAGE_DIRS, dst=REGISTRY):
+    """Register the images of ``image_dirs``, write and return the entries."""
+    entries = []
+    for image_dir in image_dirs:
+        for name in sorted(os.listdir(image_dir)):
+            if name.endswith('.png'):
+                entry = parse_asset(os.path.join(image_dir, name))
+                if entry is not None:
+                    entries.append(entry)
+    entries.sort(key=lambda e: (e['product'], e['kind'], e['year']))
+    with open(dst, 'w') as f:
+        json.dump(entries, f, indent=1)
+    return entries
+
+
+@st.cache_resource
+def _load_registry(path, mtime):
+    with open(path) as f:
+        entries = json.load(f)
+    return {(e['product'], e['kind'], e['year']): e for e in entries}
+
+
+def load_registry():
+    """Entries keyed by (product, kind, year), built on first use if missing."""
+    if not os.path.exists(REGISTRY):
+        build_registry()
+    return _load_registry(REGISTRY, os.stat(REGISTRY).st_mtime_ns)
+
+
+def asset(product, kind, year):
+    """Entry of ``product`` / ``kind`` for ``year``, None if not registered."""
+    return load_registry().get((product, kind, str(year)))
+
+
+def years(product, kind='status'):
+    """Registered years of ``product`` / ``kind``, in order."""
+    return sorted(y for p, k, y in load_registry() if p == product and k == kind)
+
+
+def latest(product, kind):
+    """Most recent entry of ``product`` / ``kind``, None if there is none."""
+    product_years = years(product, kind)
+    return asset(product, kind, product_years[-1]) if product_years else None
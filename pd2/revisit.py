@@ -0,0 +1,111 @@
+"""Revisit and cloud-free gap analysis of the optical acquisitions.
+
+Sentinel-2 acquisitions are the scenes of the cloud stats of the ROI, with
+their cloud cover; the days the daily scene calendar (``satellites_scenes.csv``,
+one acquiring sensor or none per day) marks ``S2X`` outside the stats are added
+with an unknown cover. Landsat acquisitions are the ``LC89`` days of the
+calendar, with the cover of the Sentinel-2 scene of the same day if any. Both
+are put on the daily axis of the calendar (``pd2.calendar``).
+
+An acquisition is usable when its cloud cover is at or under the threshold.
+The cloud stats only run from March to November: an acquisition of unknown
+cover is not counted as usable but reported apart, so that the winter does not
+look cloud-free. For every combination of sensors, ``longest_gaps`` finds the
+longest run of days without a usable acquisition within a window, from the
+differences between consecutive usable days.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from pd2.calendar import daily_axis, on_axis, read_scenes
+from pd2.clouds import available_years, partition_path
+from pd2.data import read_dataframe
+
+SENSORS = ['S2X', 'LC89']
+
+
+def sensor_combinations(sensors=SENSORS):
+    """Every non-empty combination of ``sensors``, smallest first."""
+    return [c for n in range(1, len(sensors) + 1) for c in itertools.combinations(sensors, n)]
+
+
+def daily_cloud_cover(years=None):
+    """Lowest ROI cloud cover (%) of each day of the cloud stats, indexed by date."""
+    years = available_years() if years is None else years
+    stats = pd.concat([read_dataframe(partition_path(y))[['date', 'perc_cloud']] for y in years])
+    stats['perc_cloud'] = stats['perc_cloud'].astype(float)
+    axis = daily_axis(stats['date'].min(), stats['date'].max())
+    return on_axis(stats, axis, agg='min')['perc_cloud'].dropna()
+
+
+def acquisitions(max_cloud=100):
+    """Daily status of the acquisitions of each sensor, indexed by date.
+
+    One column per sensor of ``SENSORS``: 'usable', 'cloudy', 'unknown' (no
+    cloud cover for the day) or NA when the sensor did not acquire. Also holds
+    the calendar ``satellite`` and the S2 cloud cover ``perc_cloud``.
+    """
+    scenes = read_scenes().join(daily_cloud_cover().rename('perc_cloud'))
+
+    acquired = {'S2X': (scenes['satellite'] == 'S2X').fillna(False) | scenes['perc_cloud'].notna(),
+                'LC89': (scenes['satellite'] == 'LC89').fillna(False)}
+    status = np.select([scenes['perc_cloud'].isna(), scenes['perc_cloud'] <= max_cloud],
+                       ['unknown', 'usable'], 'cloudy')
+    for sensor in SENSORS:
+        scenes[sensor] = pd.Series(status, index=scenes.index, dtype='string').where(acquired[sensor])
+    return scenes
+
+
+def _combined(window, combinations, value):
+    # days x sensors flags of ``value``, then days x combinations by matrix product
+    flags = np.stack([(window[s] == value).fillna(False).to_numpy() for s in SENSORS], axis=1)
+    members = np.array([[s in c for s in SENSORS] for c in combinations], dtype=int)
+    return (flags.astype(int) @ members.T) > 0
+
+
+def usable_days(scenes, start, end, combinations=None):
+    """Long frame (date, sensors, status) of the acquisitions of each combination in [start, end].
+
+    ``status`` is 'usable' when a sensor of the combination has a usable image
+    that day, else 'unknown' when one of them acquired with an unknown cover.
+    """
+    combinations = sensor_combinations() if combinations is None else combinations
+    window = scenes.loc[start:end]
+    usable = _combined(window, combinations, 'usable')
+    unknown = _combined(window, combinations, 'unknown') & ~usable
+    labels = np.array([' + '.join(c) for c in combinations])
+    frames = []
+    for status, flags in (('usable', usable), ('unknown', unknown)):
+        days, combination = np.nonzero(flags)
+        frames.append(pd.DataFrame({'date': window.index[days], 'sensors': labels[combination], 'status': status}))
+    return pd.concat(frames, ignore_index=True).sort_values(['date', 'sensors'], ignore_index=True)
+
+
+def longest_gaps(scenes, start, end, combinations=None):
+    """Longest run of days without a usable acquisition, per sensor combination.
+
+    ``scenes`` is the frame of ``acquisitions``; the window is [start, end].
+    Returns one row per combination: the number of usable acquisitions, the
+    number of days acquired with an unknown cover only (counted in the gaps),
+    the longest gap (days) and the first / last day of that gap, NaT if none.
+    """
+    combinations = sensor_combinations() if combinations is None else combinations
+    window = scenes.loc[start:end]
+    days = window.index
+    usable = _combined(window, combinations, 'usable')
+    unknown = _combined(window, combinations, 'unknown') & ~usable
+
+    rows = []
+    for c, column, unknown_days in zip(combinations, usable.T, unknown.sum(axis=0)):
+        # positions of the usable days with the window bounds as sentinels
+        hits = np.concatenate([[-1], np.flatnonzero(column), [len(days)]])
+        gaps = np.diff(hits) - 1
+        i = int(np.argmax(gaps))
+        row = {'sensors': ' + '.join(c), 'acquisitions': int(column.sum()), 'unknown': int(unknown_days),
+               'longest_gap': int(gaps[i]), 'gap_start': pd.NaT, 'gap_end': pd.NaT}
+        if gaps[i] > 0:
+            row['gap_start'], row['gap_end'] = days[hits[i] + 1], days[hits[i + 1] - 1]
+        rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,80 @@
+"""Algae surface of the bay per date, from the S2 index rasters of ``pd2.algae``.
+
+A pixel of the ROI is counted as algae when its NDVI is at or above
+``MIN_NDVI``. Only the scenes whose ROI cloud cover (the cloud stats tables)
+is at or under ``max_cloud`` are processed. Surfaces are kept in
+``SURFACE_CACHE``, keyed on the raster path, its modification time and the
+NDVI threshold: a rerun or a lower cloud threshold reads the cache, only
+scenes never seen with these settings are computed. The cache is filled by
+``scripts/compute_algae_indices.py``, so the page usually only reads it.
+"""
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import rasterio
+
+from pd2.algae import ALGAE_DIR, CATALOGUE
+from pd2.pool import map_workers
+from pd2.revisit import daily_cloud_cover
+
+SURFACE_CACHE = os.path.join(ALGAE_DIR, 'surface.csv')
+SURFACE_COLUMNS = ['key', 'date', 'path', 'min_ndvi', 'algae_ha', 'clear_ha']
+SERIES_COLUMNS = ['date', 'perc_cloud', 'algae_ha', 'clear_ha']
+MIN_NDVI = 0.3
+MAX_CLOUD = 30
+
+
+def surface_key(path, min_ndvi):
+    """Cache key of the surface of raster ``path`` at ``min_ndvi``."""
+    key = f'{os.path.abspath(path)}|{os.stat(path).st_mtime_ns}|{min_ndvi}'
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def algae_surface(path, min_ndvi=MIN_NDVI):
+    """Algae and clear (not NaN) surfaces (ha) of an NDVI raster."""
+    with rasterio.open(path) as src:
+        ndvi = src.read(1)
+        pixel_ha = abs(src.res[0] * src.res[1]) / 1e4
+    clear = np.isfinite(ndvi)
+    return {'algae_ha': np.count_nonzero(ndvi[clear] >= min_ndvi) * pixel_ha,
+            'clear_ha': np.count_nonzero(clear) * pixel_ha}
+
+
+def _load_cache(cache):
+    if not os.path.exists(cache):
+        return pd.DataFrame(columns=SURFACE_COLUMNS)
+    # two sessions seeing a new raster at once both append it
+    return pd.read_csv(cache).drop_duplicates('key')
+
+
+def surface_series(max_cloud=MAX_CLOUD, min_ndvi=MIN_NDVI, catalogue=CATALOGUE, cache=SURFACE_CACHE,
+                   workers=None):
+    """Algae surface (ha) of every S2 date at or under ``max_cloud`` % of ROI clouds.
+
+    Returns ``SERIES_COLUMNS`` sorted by date, empty without catalogue.
+    ``workers`` is passed to ``pd2.pool.map_workers``.
+    """
+    if not os.path.exists(catalogue):
+        return pd.DataFrame({'date': pd.to_datetime([])}).reindex(columns=SERIES_COLUMNS)
+    scenes = pd.read_csv(catalogue)
+    scenes = scenes[(scenes['sensor'] == 's2') & (scenes['index'] == 'ndvi')]
+    scenes = scenes.assign(date=pd.to_datetime(scenes['date']))
+    scenes = scenes.join(daily_cloud_cover().rename('perc_cloud'), on='date')
+    scenes = scenes[scenes['perc_cloud'] <= max_cloud]
+    scenes = scenes.assign(key=pd.Series([surface_key(p, min_ndvi) for p in scenes['path']], index=scenes.index,
+                                         dtype=object))
+
+    known = _load_cache(cache)
+    new = scenes[~scenes['key'].isin(known['key'])]
+    if not new.empty:
+        paths = new['path'].to_list()
+        surfaces = map_workers(algae_surface, [(p, min_ndvi) for p in paths], workers)
+        rows = pd.DataFrame(surfaces).assign(key=new['key'].to_numpy(), date=new['date'].dt.date.to_numpy(),
+                                             path=paths, min_ndvi=min_ndvi)[SURFACE_COLUMNS]
+        rows.to_csv(cache, mode='a', index=False, header=not os.path.exists(cache))
+        known = pd.concat([known, rows], ignore_index=True) if not known.empty else rows
+
+    series = scenes[['key', 'date', 'perc_cloud']].merge(known[['key', 'algae_ha', 'clear_ha']], on='key')
+    return series[SERIES_COLUMNS].sort_values('date', ignore_index=True)
@@ -0,0 +1,150 @@
+"""Mapbox Vector Tile server for the layers of ``pd2.layers.LAYERS``.
+
+Tiles are cut on demand from the FlatGeobuf sources at
+``/{layer}/{z}/{x}/{y}.pbf`` and kept in an LRU cache, so a map only receives
+the features in view, simplified to the tile resolution.
+
+The server is off unless ``PD2_TILE_SERVER`` is set (``1`` / ``true``): it
+listens on ``PD2_TILE_PORT`` and the browser must be able to reach it, at
+``PD2_TILE_URL`` when the app is not browsed from the same host.
+"""
+import functools
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import mapbox_vector_tile
+import shapely
+import streamlit as st
+from branca.element import MacroElement
+from folium.plugins import VectorGridProtobuf
+from folium.template import Template
+
+from pd2.layers import LAYERS, read_layer
+
+TILE_PORT = int(os.environ.get('PD2_TILE_PORT', 8765))
+TILE_URL = os.environ.get('PD2_TILE_URL', f'http://localhost:{TILE_PORT}')
+TILE_CACHE_SIZE = 4096
+# tile grid resolution and the margin kept around each tile, in grid units
+EXTENT = 4096
+BUFFER = 64
+
+_HALF_WORLD = 20037508.342789244
+_TILE_PATH = re.compile(r'/(\w+)/(\d+)/(\d+)/(\d+)\.pbf')
+
+
+def tiles_enabled():
+    return os.environ.get('PD2_TILE_SERVER', '').lower() in ('1', 'true')
+
+
+def tile_bounds(z, x, y):
+    """Web mercator bounds (minx, miny, maxx, maxy) of tile z/x/y."""
+    size = 2 * _HALF_WORLD / 2 ** z
+    minx = -_HALF_WORLD + x * size
+    maxy = _HALF_WORLD - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+@functools.lru_cache(maxsize=None)
+def _layer_frame(name, mtime):
+    frame = read_layer(name).to_crs(3857)
+    frame.sindex  # built once, queried by every tile
+    return frame
+
+
+@functools.lru_cache(maxsize=TILE_CACHE_SIZE)
+def _render_tile(name, mtime, z, x, y):
+    frame = _layer_frame(name, mtime)
+    bounds = tile_bounds(z, x, y)
+    margin = (bounds[2] - bounds[0]) * BUFFER / EXTENT
+    clip = (bounds[0] - margin, bounds[1] - margin, bounds[2] + margin, bounds[3] + margin)
+
+    hits = frame.sindex.query(shapely.box(*clip), predicate='intersects')
+    geoms = shapely.clip_by_rect(frame.geometry.values[hits], *clip)
+    # nothing finer than a grid cell survives the encoding anyway
+    geoms = shapely.simplify(geoms, (bounds[2] - bounds[0]) / EXTENT, preserve_topology=True)
+    attributes = frame.iloc[hits].drop(columns='geometry')
+    # a layer of geometries only (roi) still needs one properties dict per feature
+    properties = attributes.to_dict('records') if len(attributes.columns) else [{}] * len(hits)
+    features = [{'geometry': geom, 'properties': props}
+                for geom, props in zip(geoms, properties) if not geom.is_empty]
+    return mapbox_vector_tile.encode([{'name': name, 'features': features}],
+                                     default_options={'quantize_bounds': bounds, 'extents': EXTENT})
+
+
+def render_tile(name, z, x, y):
+    """MVT bytes of tile z/x/y of layer ``name`` (one MVT layer named after it)."""
+    return _render_tile(name, os.stat(LAYERS[name]['src']).st_mtime_ns, z, x, y)
+
+
+class TileHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        match = _TILE_PATH.fullmatch(self.path)
+        if match is None or match[1] not in LAYERS:
+            self.send_error(404)
+            return
+        data = render_tile(match[1], *map(int, match.groups()[1:]))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.mapbox-vector-tile')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Cache-Control', 'max-age=3600')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@st.cache_resource
+def start_tile_server(port=TILE_PORT):
+    """Serve tiles from a daemon thread, once per process.
+
+    Returns None when the port is taken, assuming it is held by another app
+    process or by ``scripts/serve_tiles.py``.
+    """
+    try:
+        server = ThreadingHTTPServer(('', port), TileHandler)
+    except OSError:
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _TilePopup(MacroElement):
+    # VectorGrid has no popup of its own, open one with the clicked feature's fields
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        {{ this._parent.get_name() }}.on('click', function(e) {
+            var fields = {{ this.fields|tojson }};
+            var aliases = {{ this.aliases|tojson }};
+            var html = fields.map(function(f, i) {
+                return '<b>' + aliases[i] + '</b>' + e.layer.properties[f];
+            }).join('<br>');
+            L.popup().setLatLng(e.latlng).setContent(html).openOn(e.target._map);
+        });
+        {% endmacro %}
+        """)
+
+    def __init__(self, fields, aliases):
+        super().__init__()
+        self._name = 'TilePopup'
+        self.fields = list(fields)
+        self.aliases = list(aliases)
+
+
+def tile_layer(name, style, fields=(), aliases=()):
+    """Folium layer reading ``name`` from the tile server, with an optional popup."""
+    start_tile_server()
+    options = {
+        'interactive': bool(fields),
+        'vectorTileLayerStyles': {name: {'fill': True, 'weight': 3, 'fillOpacity': 0.2, **style}},
+    }
+    # passed as a string, folium would camelCase the layer name of a dict
+    layer = VectorGridProtobuf(f'{TILE_URL}/{name}/{{z}}/{{x}}/{{y}}.pbf', name, json.dumps(options))
+    if fields:
+        layer.add_child(_TilePopup(fields, aliases))
+    return layer
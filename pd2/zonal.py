@@ -0,0 +1,168 @@
+"""Per catchment basin statistics of CLMS rasters.
+
+Recomputes the tables charted by the CLMS page (``grass_change_table``,
+``swf_change_table``, ``tccm``), keyed by ``Catchment basin``, from the
+source rasters. The basins of ``bv_sb-4326.fgb`` are rasterized once per
+raster grid, over the window covering them, into a label raster cached as
+``.npy`` under ``LABEL_DIR``. Each raster is then read by chunks of rows of
+that window, in a pool of worker processes, and counted per (basin, value)
+with a single ``np.bincount`` per chunk.
+
+For regional rasters, ``streamed_class_areas`` reads the raster block by
+block through ``pd2.blocks.iter_blocks`` instead, skipping the blocks away
+from the basins, so memory stays bounded by one block.
+"""
+import csv
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import pyogrio
+import rasterio
+from rasterio.features import geometry_window, rasterize
+from rasterio.windows import Window
+
+from pd2.blocks import CLIP, iter_blocks
+from pd2.pool import map_workers
+
+BASINS = 'data/geometries/bv_sb-4326.fgb'
+BASIN_FIELD = 'ida'
+LABEL_DIR = 'data/zonal_cache'
+CHUNK_ROWS = 1024
+
+
+def read_basins(path=BASINS, crs=None):
+    """Basin ids (ints, sorted) and geometries, in ``crs`` if given."""
+    basins = pyogrio.read_dataframe(path, columns=[BASIN_FIELD])
+    if crs is not None:
+        basins = basins.to_crs(crs)
+    basins[BASIN_FIELD] = basins[BASIN_FIELD].astype(int)
+    basins = basins.sort_values(BASIN_FIELD, ignore_index=True)
+    return basins[BASIN_FIELD].to_list(), basins.geometry.values
+
+
+def basin_labels(raster_path, basins=BASINS):
+    """Label raster of the basins on the grid of ``raster_path``.
+
+    Returns the ``.npy`` path of the labels (0 outside the basins, i + 1 for
+    the i-th basin id), the window of the raster they cover and the basin ids.
+    The labels are only rasterized the first time a grid is seen.
+    """
+    with rasterio.open(raster_path) as src:
+        if not src.crs.is_projected:
+            raise ValueError(f'{raster_path} is not in a projected crs, pixel areas would be wrong')
+        ids, geoms = read_basins(basins, src.crs)
+        window = geometry_window(src, geoms)
+        transform = src.window_transform(window)
+        grid = f'{src.crs.to_wkt()}|{transform}|{window}|{os.path.abspath(basins)}|{os.stat(basins).st_mtime_ns}'
+
+    path = os.path.join(LABEL_DIR, hashlib.sha1(grid.encode()).hexdigest() + '.npy')
+    if not os.path.exists(path):
+        labels = rasterize(zip(geoms, range(1, len(ids) + 1)), out_shape=(window.height, window.width),
+                           transform=transform, fill=0, dtype='uint16')
+        os.makedirs(LABEL_DIR, exist_ok=True)
+        np.save(path + '.tmp.npy', labels)
+        os.replace(path + '.tmp.npy', path)
+    return path, window, ids
+
+
+def _count_chunk(raster_path, label_path, window, row_start, row_stop, n_labels, n_values):
+    with rasterio.open(raster_path) as src:
+        values = src.read(1, window=Window(window.col_off, window.row_off + row_start,
+                                           window.width, row_stop - row_start))
+        nodata = src.nodata
+    labels = np.load(label_path, mmap_mode='r')[row_start:row_stop].astype(np.int64)
+    if nodata is not None:
+        labels[values == nodata] = 0
+    index = labels * n_values + values
+    return np.bincount(index.ravel(), minlength=(n_labels + 1) * n_values).reshape(n_labels + 1, n_values)
+
+
+def _areas_frame(counts, ids, pixel_ha):
+    counts = counts[1:]  # outside the basins
+    present = np.flatnonzero(counts.sum(axis=0))
+    return pd.DataFrame(counts[:, present] * pixel_ha, index=pd.Index(ids, name='Catchment basin'),
+                        columns=present)
+
+
+def class_areas(raster_path, basins=BASINS, workers=None):
+    """Area (ha) of each raster value per basin: basin ids as index, values as columns.
+
+    Only integer rasters are supported (class maps). ``workers`` is passed to
+    ``pd2.pool.map_workers``.
+    """
+    label_path, window, ids = basin_labels(raster_path, basins)
+    with rasterio.open(raster_path) as src:
+        if not np.issubdtype(np.dtype(src.dtypes[0]), np.unsignedinteger):
+            raise ValueError(f'{raster_path} is not a class raster ({src.dtypes[0]})')
+        n_values = int(np.iinfo(src.dtypes[0]).max) + 1
+        pixel_ha = abs(src.res[0] * src.res[1]) / 1e4
+
+    chunks = [(r, min(r + CHUNK_ROWS, window.height)) for r in range(0, window.height, CHUNK_ROWS)]
+    args = [(raster_path, label_path, window, start, stop, len(ids), n_values) for start, stop in chunks]
+    counts = sum(map_workers(_count_chunk, args, workers))
+
+    return _areas_frame(counts, ids, pixel_ha)
+
+
+def streamed_class_areas(raster_path, basins=BASINS, clip=CLIP, mmap=None):
+    """``class_areas`` of ``raster_path`` read block by block (see ``pd2.blocks``)."""
+    label_path, window, ids = basin_labels(raster_path, basins)
+    labels = np.load(label_path, mmap_mode='r')
+    with rasterio.open(raster_path) as src:
+        n_values = int(np.iinfo(src.dtypes[0]).max) + 1
+        pixel_ha = abs(src.res[0] * src.res[1]) / 1e4
+        nodata = src.nodata
+
+    counts = np.zeros((len(ids) + 1, n_values), dtype=np.int64)
+    for block, values in iter_blocks(raster_path, clip, mmap=mmap):
+        # part of the block inside the labelled window
+        row_start, col_start = block.row_off - window.row_off, block.col_off - window.col_off
+        rows = slice(max(row_start, 0), min(row_start + block.height, window.height))
+        cols = slice(max(col_start, 0), min(col_start + block.width, window.width))
+        if rows.start >= rows.stop or cols.start >= cols.stop:
+            continue
+        block_labels = labels[rows, cols].astype(np.int64)
+        values = values[rows.start - row_start:rows.stop - row_start, cols.start - col_start:cols.stop - col_start]
+        if nodata is not None:
+            block_labels[values == nodata] = 0
+        counts += np.bincount((block_labels * n_values + values).ravel(),
+                              minlength=counts.size).reshape(counts.shape)
+
+    return _areas_frame(counts, ids, pixel_ha)
+
+
+def _class_areas(raster_path, workers=None, stream=False):
+    return streamed_class_areas(raster_path) if stream else class_areas(raster_path, workers=workers)
+
+
+def status_table(rasters, classes, workers=None, stream=False):
+    """Area (ha) of ``classes`` per basin, one column per label of ``rasters``.
+
+    ``rasters`` maps a column label (e.g. the year) to a raster path: the
+    ``grass_change_table`` / ``swf_change_table`` layout. ``stream`` reads
+    the rasters block by block (``streamed_class_areas``).
+    """
+    columns = {}
+    for label, path in rasters.items():
+        areas = _class_areas(path, workers, stream)
+        columns[str(label)] = areas.reindex(columns=list(classes), fill_value=0).sum(axis=1)
+    return pd.DataFrame(columns).reset_index()
+
+
+def gain_loss_table(raster_path, gain, loss, workers=None, stream=False):
+    """Gain and (negative) loss areas (ha) per basin of a change raster: the ``tccm`` layout."""
+    areas = _class_areas(raster_path, workers, stream)
+    return pd.DataFrame({
+        'Gain': areas.reindex(columns=list(gain), fill_value=0).sum(axis=1),
+        'Loss': -areas.reindex(columns=list(loss), fill_value=0).sum(axis=1),
+    }).reset_index()
+
+
+def write_table(table, path, sep=';', decimals=2):
+    """Write ``table`` like the tables of data/dataframes (quoted header)."""
+    table = table.round(decimals)
+    with open(path, 'w', newline='') as f:
+        csv.writer(f, delimiter=sep, quoting=csv.QUOTE_NONNUMERIC).writerow(table.columns)
+        table.to_csv(f, sep=sep, header=False, index=False)
@@ -0,0 +1,30 @@
+"""Build the crop area cube of the Third party page from parcel classification vectors.
+
+One partition per year, replacing the partition of a year already in the cube:
+    python scripts/build_crop_cube.py --parcels 2022 parcels_2022.gpkg --parcels 2023 parcels_2023.gpkg
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.crops import CROP_FIELD, CROP_STORE, build_cube, crop_shares  # noqa: E402
+from pd2.zonal import BASINS  # noqa: E402
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--parcels', nargs=2, action='append', required=True, metavar=('YEAR', 'PATH'))
+    parser.add_argument('--field', default=CROP_FIELD, help='crop label field of the parcels')
+    parser.add_argument('--basins', default=BASINS)
+    parser.add_argument('--store', default=CROP_STORE)
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of CPUs')
+    args = parser.parse_args()
+
+    parcels = dict(args.parcels)
+    for path in build_cube(parcels, args.store, args.basins, args.field, args.workers):
+        print(f'written {path}')
+    for year in sorted(parcels):
+        shares = crop_shares(year, store=args.store)
+        print(f'\n{year}')
+        print(shares[shares['area_ha'] > 0].round(2).to_string(index=False))
@@ -0,0 +1,16 @@
+"""Precompute the trimmed, multi-resolution GeoJSON layers served by the folium study maps.
+
+usage : python scripts/build_geojson.py [layer ...]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.layers import LAYERS, PYRAMID, build_geojson  # noqa: E402
+
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or LAYERS:
+        for path, (min_zoom, tolerance) in zip(build_geojson(name), PYRAMID):
+            print(f'{name}: zoom >= {min_zoom:>2} tolerance {tolerance:<6} -> {path} '
+                  f'({os.path.getsize(path) / 1e3:.0f} kB)')
@@ -0,0 +1,20 @@
+"""Build the resized WebP / AVIF derivatives of data/images and their manifest.
+
+usage : python scripts/build_images.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.images import DERIVATIVES_DIR, FORMATS, IMAGES_DIR, build_manifest  # noqa: E402
+
+
+if __name__ == '__main__':
+    manifest = build_manifest()
+    original = sum(os.path.getsize(os.path.join(IMAGES_DIR, k)) for k in manifest)
+    print(f'{len(manifest)} images, {original / 1e6:.1f} MB of originals')
+    for fmt in FORMATS:
+        full = sum(os.path.getsize(os.path.join(DERIVATIVES_DIR, e['variants'][-1][fmt])) for e in manifest.values())
+        total = sum(os.path.getsize(os.path.join(DERIVATIVES_DIR, v[fmt]))
+                    for e in manifest.values() for v in e['variants'])
+        print(f'{fmt}: {full / 1e6:.1f} MB at full width, {total / 1e6:.1f} MB for all widths')
@@ -0,0 +1,17 @@
+"""Build data/registry.json from the map and table images of the CLMS / third-party pages.
+
+usage : python scripts/build_registry.py
+"""
+import os
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.registry import REGISTRY, build_registry  # noqa: E402
+
+
+if __name__ == '__main__':
+    entries = build_registry()
+    print(f'{len(entries)} assets registered in {REGISTRY}')
+    for (product, kind), count in sorted(Counter((e['product'], e['kind']) for e in entries).items()):
+        print(f'  {product:<10} {kind:<13} {count}')
@@ -0,0 +1,42 @@
+"""Compute chlorophyll / algae indices of local S2 and S3 scenes over the ROI.
+
+Also fills the algae surface cache of the Algaes page (S2 NDVI dates with at
+most --max-cloud % of clouds).
+
+usage : python scripts/compute_algae_indices.py SCENE_DIR [SCENE_DIR ...] [--masks MASK_DIR]
+        [--index ndci ndvi] [--dst data/algae] [--roi roi.fgb] [--max-cloud 30] [--workers N]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.algae import ALGAE_DIR, CATALOGUE, INDICES, compute_indices, list_scenes  # noqa: E402
+from pd2.clouds import ROI  # noqa: E402
+from pd2.surface import MAX_CLOUD, SURFACE_CACHE, surface_series  # noqa: E402
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scene_dirs', nargs='+', help='folders holding S2 .SAFE and S3 scene folders')
+    parser.add_argument('--masks', help='cloud / shadow masks of the cloud stats, to mask the indices')
+    parser.add_argument('--index', nargs='+', default=list(INDICES), choices=list(INDICES))
+    parser.add_argument('--dst', default=ALGAE_DIR)
+    parser.add_argument('--roi', default=ROI)
+    parser.add_argument('--max-cloud', type=float, default=MAX_CLOUD,
+                        help='cloud cover (%%) up to which the algae surface of a date is cached')
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of CPUs')
+    args = parser.parse_args()
+
+    scenes = list_scenes(*args.scene_dirs)
+    if not scenes:
+        sys.exit(f'no S2 / S3 scene found in {", ".join(args.scene_dirs)}')
+    rows = compute_indices(scenes, args.index, args.roi, args.masks, args.dst, args.workers)
+    print(f'{len(scenes)} scenes, {len(rows)} index rasters written to {args.dst}')
+    print(rows[['sensor', 'date', 'index', 'clear_pct', 'mean']].to_string(index=False))
+
+    if 'ndvi' in args.index:
+        catalogue = os.path.join(args.dst, os.path.basename(CATALOGUE))
+        cache = os.path.join(args.dst, os.path.basename(SURFACE_CACHE))
+        surfaces = surface_series(args.max_cloud, catalogue=catalogue, cache=cache, workers=args.workers)
+        print(f'algae surface of {len(surfaces)} dates cached in {cache}')
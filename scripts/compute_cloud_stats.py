@@ -0,0 +1,26 @@
+"""Compute the cloud stats table of a folder of Sentinel-2 cloud / shadow masks.
+
+usage : python scripts/compute_cloud_stats.py MASK_DIR [dst.csv] [--roi roi.fgb] [--workers N]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.clouds import ROI, compute_cloud_stats, list_masks  # noqa: E402
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('mask_dir')
+    parser.add_argument('dst', nargs='?', help='defaults to data/dataframes/cloud_stats_{year}_df.csv')
+    parser.add_argument('--roi', default=ROI)
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of CPUs')
+    args = parser.parse_args()
+
+    stats = compute_cloud_stats(list_masks(args.mask_dir), args.roi, args.workers)
+    if stats.empty:
+        sys.exit(f'no mask found in {args.mask_dir}')
+    dst = args.dst or f'data/dataframes/cloud_stats_{stats["date"].iloc[0][:4]}_df.csv'
+    stats.to_csv(dst, index=False)
+    print(f'{len(stats)} scenes ({stats["date"].iloc[0]} - {stats["date"].iloc[-1]}) written to {dst}')
@@ -0,0 +1,21 @@
+"""Write the crop cover duration of every parcel of an NDVI store (cover_days.npy next to ndvi.npy).
+
+usage : python scripts/compute_cover_durations.py [store_dir] [--threshold 0.27] [--workers N]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.ndvi import DELTA_END, DELTA_START, NDVI_STORE, NDVI_THRESHOLD, write_cover_durations  # noqa: E402
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('store', nargs='?', default=NDVI_STORE)
+    parser.add_argument('--threshold', type=float, default=NDVI_THRESHOLD, help='covered at or above this NDVI')
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of CPUs')
+    args = parser.parse_args()
+
+    dst = write_cover_durations(args.store, args.threshold, DELTA_START, DELTA_END, args.workers)
+    print(f'cover durations written to {dst}')
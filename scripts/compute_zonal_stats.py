@@ -0,0 +1,41 @@
+"""Compute a per catchment basin table of the CLMS page from source rasters.
+
+Status tables (grass_change_table / swf_change_table layout, one column per year):
+    python scripts/compute_zonal_stats.py status DST --raster 2015 grass_2015.tif --raster 2018 grass_2018.tif --class 1
+Change tables (tccm layout, Gain and Loss columns):
+    python scripts/compute_zonal_stats.py change DST tccm_15-18.tif --gain 1 --loss 2
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.zonal import gain_loss_table, status_table, write_table  # noqa: E402
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sep', default=';', help="column separator (grass_change_table uses ',')")
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of CPUs')
+    parser.add_argument('--stream', action='store_true',
+                        help='read block by block in one process, for rasters larger than memory')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    status = commands.add_parser('status')
+    status.add_argument('dst')
+    status.add_argument('--raster', nargs=2, action='append', required=True, metavar=('LABEL', 'PATH'))
+    status.add_argument('--class', dest='classes', type=int, action='append', required=True)
+
+    change = commands.add_parser('change')
+    change.add_argument('dst')
+    change.add_argument('raster')
+    change.add_argument('--gain', type=int, action='append', required=True)
+    change.add_argument('--loss', type=int, action='append', required=True)
+
+    args = parser.parse_args()
+    if args.command == 'status':
+        table = status_table(dict(args.raster), args.classes, args.workers, args.stream)
+    else:
+        table = gain_loss_table(args.raster, args.gain, args.loss, args.workers, args.stream)
+    write_table(table, args.dst, sep=args.sep)
+    print(table.to_string(index=False))
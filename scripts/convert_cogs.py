@@ -0,0 +1,65 @@
+"""Convert the source rasters of the map layers to Cloud-Optimized GeoTIFFs.
+
+Every raster of SRC_DIR named after a PNG layer of data/images/clms or
+data/images/third_party (e.g. clc_2018.tif, grass_2015.tif, tccm_12-15.tif,
+crop_id_2023.tif) is reprojected to web mercator, cropped to the buffered
+catchment basins and written as data/cogs/<name>.tif, with overviews and its
+colour table, for pd2.rasters.show_raster.
+
+usage : python scripts/convert_cogs.py SRC_DIR
+"""
+import glob
+import math
+import os
+import sys
+
+import rasterio
+import rasterio.shutil
+from pyogrio import read_dataframe
+from rasterio.enums import ColorInterp, Resampling
+from rasterio.io import MemoryFile
+from rasterio.vrt import WarpedVRT
+from rasterio.transform import from_origin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.rasters import COG_DIR  # noqa: E402
+
+LAYER_DIRS = ['data/images/clms', 'data/images/third_party']
+CLIP = 'data/geometries/bv_sb_buf2500-4326.fgb'
+
+
+def convert(src_path, dst_path, bounds):
+    with rasterio.open(src_path) as src:
+        # class maps must not be interpolated
+        categorical = src.colorinterp[0] == ColorInterp.palette or src.dtypes[0] in ('uint8', 'int8', 'uint16')
+        resampling = Resampling.nearest if categorical else Resampling.bilinear
+        # keep the native resolution, on a grid limited to the study area
+        with WarpedVRT(src, crs='EPSG:3857') as full:
+            res = full.res[0]
+        minx, miny, maxx, maxy = bounds
+        width, height = math.ceil((maxx - minx) / res), math.ceil((maxy - miny) / res)
+        with WarpedVRT(src, crs='EPSG:3857', resampling=resampling, transform=from_origin(minx, maxy, res, res),
+                       width=width, height=height) as vrt:
+            profile = vrt.profile | {'driver': 'GTiff'}
+            with MemoryFile() as mem, mem.open(**profile) as tmp:
+                tmp.write(vrt.read())
+                if src.colorinterp[0] == ColorInterp.palette:
+                    tmp.write_colormap(1, src.colormap(1))
+                rasterio.shutil.copy(tmp, dst_path, driver='COG', compress='DEFLATE',
+                                     resampling='NEAREST' if categorical else 'AVERAGE')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.exit(__doc__)
+    layers = {os.path.splitext(os.path.basename(p))[0] for d in LAYER_DIRS for p in glob.glob(f'{d}/*.png')}
+    bounds = read_dataframe(CLIP).to_crs(3857).total_bounds
+    os.makedirs(COG_DIR, exist_ok=True)
+
+    for src_path in sorted(glob.glob(os.path.join(sys.argv[1], '*'))):
+        name, ext = os.path.splitext(os.path.basename(src_path))
+        if ext.lower() not in ('.tif', '.tiff', '.vrt') or name not in layers:
+            continue
+        dst_path = os.path.join(COG_DIR, f'{name}.tif')
+        convert(src_path, dst_path, bounds)
+        print(f'{src_path} -> {dst_path} ({os.path.getsize(dst_path) / 1e6:.1f} MB)')
@@ -0,0 +1,26 @@
+"""Convert a stringified NDVI csv (cover_duration.csv layout) to a dense store.
+
+usage : python scripts/convert_ndvi_store.py [src.csv] [dst_dir] [--start YYYY-MM-DD]
+"""
+import argparse
+import os
+import sys
+
+from pyogrio import read_dataframe
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.calendar import SEASON_START, daily_axis  # noqa: E402
+from pd2.ndvi import NDVI_STORE, parse_ndvi_series, write_ndvi_store  # noqa: E402
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('src', nargs='?', default='data/dataframes/cover_duration.csv')
+    parser.add_argument('dst', nargs='?', default=NDVI_STORE)
+    parser.add_argument('--start', default=SEASON_START, help='date of the first value of each series')
+    args = parser.parse_args()
+
+    parcels, ndvi = parse_ndvi_series(read_dataframe(args.src))
+    dates = daily_axis(args.start, periods=ndvi.shape[1])
+    write_ndvi_store(args.dst, parcels, ndvi, dates)
+    print(f'{len(parcels)} parcels x {len(dates)} days ({dates[0]:%Y-%m-%d} - {dates[-1]:%Y-%m-%d}) written to {args.dst}')
@@ -0,0 +1,31 @@
+"""Fuse the S2 and S3 algae indices of the catalogue into 20 m maps of the S3-only dates.
+
+usage : python scripts/fuse_algae_indices.py [--index ndvi] [--dst data/algae] [--min-pairs 3] [--roi roi.fgb]
+        [--workers N]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.algae import ALGAE_DIR, CATALOGUE, INDICES  # noqa: E402
+from pd2.clouds import ROI  # noqa: E402
+from pd2.fusion import MIN_PAIRS, fuse  # noqa: E402
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--index', default='ndvi', choices=list(INDICES))
+    parser.add_argument('--dst', default=ALGAE_DIR, help='folder of the catalogue written by compute_algae_indices.py')
+    parser.add_argument('--min-pairs', type=int, default=MIN_PAIRS,
+                        help='co-clear dates under which a pixel uses the regression of the whole ROI')
+    parser.add_argument('--roi', default=ROI, help='region of the clear shares, as for compute_algae_indices.py')
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of CPUs')
+    args = parser.parse_args()
+
+    catalogue = os.path.join(args.dst, os.path.basename(CATALOGUE))
+    fused = fuse(args.index, catalogue, args.dst, min_pairs=args.min_pairs, roi_path=args.roi,
+                 workers=args.workers)
+    print(f'{len(fused)} fused {args.index} maps written to {args.dst}')
+    if not fused.empty:
+        print(fused[['date', 'clear_pct', 'mean']].to_string(index=False))
@@ -0,0 +1,26 @@
+"""Add the new scenes of a folder of Sentinel-2 cloud / shadow masks to the cloud stats store.
+
+Scenes already in the index are skipped, new ones are appended to the table
+of their year (data/dataframes/cloud_stats_{year}_df.csv).
+
+usage : python scripts/ingest_cloud_stats.py MASK_DIR [--roi roi.fgb] [--workers N]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.clouds import ROI, ingest_masks, list_masks  # noqa: E402
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('mask_dir')
+    parser.add_argument('--roi', default=ROI)
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of CPUs')
+    args = parser.parse_args()
+
+    added = ingest_masks(list_masks(args.mask_dir), roi_path=args.roi, workers=args.workers)
+    print(f'{len(added)} new scenes added')
+    for year, count in added['date'].str[:4].value_counts().sort_index().items():
+        print(f'  {year} : {count}')
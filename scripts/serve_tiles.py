@@ -0,0 +1,16 @@
+"""Run the vector tile server on its own, e.g. next to several app processes.
+
+usage : python scripts/serve_tiles.py [port]
+"""
+import os
+import sys
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.tiles import TILE_PORT, TileHandler  # noqa: E402
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else TILE_PORT
+    print(f'serving /{{layer}}/{{z}}/{{x}}/{{y}}.pbf on port {port}')
+    ThreadingHTTPServer(('', port), TileHandler).serve_forever()
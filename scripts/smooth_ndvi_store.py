@@ -0,0 +1,22 @@
+"""Write the Whittaker smoothing of an NDVI store (smooth.npy next to ndvi.npy).
+
+usage : python scripts/smooth_ndvi_store.py [store_dir] [--lambda 1000] [--workers N]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pd2.ndvi import NDVI_STORE, WHITTAKER_LAMBDA, store_whittaker  # noqa: E402
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('store', nargs='?', default=NDVI_STORE)
+    parser.add_argument('--lambda', dest='lam', type=float, default=WHITTAKER_LAMBDA,
+                        help='smoothing strength, larger is smoother')
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of CPUs')
+    args = parser.parse_args()
+
+    dst = store_whittaker(args.store, args.lam, args.workers)
+    print(f'smoothed series written to {dst}')